@@ -2,7 +2,8 @@
 from pkg_resources import get_distribution, DistributionNotFound
 
 from .annotations import ECGAnnotation
-from .ecg import ECGRecord, Signal, Time, SubjectInfo
+from .ecg import ECGRecord, Signal, DerivedSignal, Time, SubjectInfo
+from .leads import LeadTransform, LIMB_LEADS, INVERSE_DOWER
 
 try:
     # Change here if project is renamed and does not equal the package name
@@ -1,3 +1,5 @@
+import numpy as np
+
 from .constants import *
 
 
@@ -33,6 +35,32 @@ class ECGAnnotation:
     def __init__(self, annotations=[]):
         self._annotation_samples = annotations
 
+    def __reduce__(self):
+        return ECGAnnotation.from_arrays, (self.indices, self.labels)
+
+    @classmethod
+    def from_arrays(cls, indices, labels):
+        if len(indices) != len(labels):
+            raise ValueError(f"len(indices) = {len(indices)} != len(labels) = {len(labels)}")
+        return cls([ECGAnnotationSample(i, l) for i, l in zip(np.asarray(indices).tolist(), np.asarray(labels).tolist())])
+
+    def to_arrow(self):
+        from pyecg.arrow import annotations_to_arrow
+        return annotations_to_arrow(self)
+
+    @classmethod
+    def from_arrow(cls, table):
+        from pyecg.arrow import annotations_from_arrow
+        return annotations_from_arrow(table)
+
+    @property
+    def indices(self):
+        return np.array([i.index for i in self._annotation_samples], dtype=np.int64)
+
+    @property
+    def labels(self):
+        return np.array([i.label for i in self._annotation_samples], dtype=str)
+
     @property
     def unique_labels(self):
         unique_labels = list(set([i.label for i in self._annotation_samples]))
@@ -42,5 +70,24 @@ class ECGAnnotation:
     def select_label(self, label):
         return ECGAnnotation(list(filter(lambda x: x.label == label, self._annotation_samples)))
 
+    def shift(self, offset):
+        return ECGAnnotation([ECGAnnotationSample(a.index + offset, a.label) for a in self._annotation_samples])
+
+    def window(self, start, stop):
+        # annotations in [start, stop), re-indexed relative to start
+        return self.windows([start], [stop])[0]
+
+    def windows(self, starts, stops):
+        # one window per (start, stop) pair, all of them located with a single searchsorted over the indices
+        indices = self.indices
+        order = np.argsort(indices, kind="stable")
+        firsts = np.searchsorted(indices[order], starts, side="left").tolist()
+        lasts = np.searchsorted(indices[order], stops, side="left").tolist()
+        order = order.tolist()
+        samples = self._annotation_samples
+        return [ECGAnnotation([ECGAnnotationSample(samples[k].index - start, samples[k].label)
+                               for k in order[first:max(first, last)]])
+                for start, first, last in zip(np.asarray(starts).tolist(), firsts, lasts)]
+
     def __add__(self, other):
         return ECGAnnotation(self._annotation_samples + other._annotation_samples)
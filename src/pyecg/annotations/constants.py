@@ -5,5 +5,13 @@ CALIB_PULSE = "C"
 BBB_BEAT = "B"
 PACED_BEAT = "P"
 ARTEFACT = "X"
+ARTEFACT_END = "X)"  # last sample of an artefact episode opened by ARTEFACT
 TIMEOUT = "!"
-UNKNOWN = "U"
\ No newline at end of file
+UNKNOWN = "U"
+RHYTHM_CHANGE = "+"
+# labels that mark a beat: the ones above plus the remaining WFDB (MIT-BIH) beat codes, everything else
+# (rhythm changes, noise, comments, waveform onsets and offsets, ...) is not a beat
+BEAT_LABELS = [NORMAL_BEAT, PVC, SUPRAVENTRICULAR_ECTOPIC, BBB_BEAT, PACED_BEAT, UNKNOWN,
+               "L", "R", "A", "a", "J", "j", "e", "n", "E", "F", "f", "r", "/", "Q", "?"]
+# labels that interrupt the beat sequence (artefacts, timeouts, noise and flutter episodes), no RR interval spans them
+GAP_LABELS = [ARTEFACT, ARTEFACT_END, TIMEOUT, "~", "|", "[", "]"]
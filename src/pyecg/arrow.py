@@ -0,0 +1,210 @@
+import json
+
+import numpy as np
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation
+from pyecg.segmented import SegmentedArray
+
+FORMATS = ["parquet", "ipc"]
+METADATA_KEY = b"pyecg"
+ROW_GROUP_SIZE = 1 << 16
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow export, install it with `pip install pyECG[arrow]`")
+    return pyarrow
+
+
+def _column(data):
+    pa = _pyarrow()
+    # numeric ndarrays are wrapped without a copy, segmented buffers become one chunk per segment
+    if isinstance(data, SegmentedArray):
+        return pa.chunked_array([pa.array(np.asarray(segment)) for segment in data.segments])
+    return pa.chunked_array([pa.array(np.asarray(data))])
+
+
+def _array(column):
+    # single-chunk columns come back as views of the Arrow buffers
+    chunks = [chunk.to_numpy(zero_copy_only=False) for chunk in column.chunks]
+    if len(chunks) == 1:
+        return chunks[0]
+    return SegmentedArray(chunks) if chunks else np.empty(0, dtype=column.type.to_pandas_dtype())
+
+
+def record_to_arrow(record):
+    pa = _pyarrow()
+    columns = {"time": _column(record.time.seq_data)}
+    for signal in record._signals:
+        columns[signal.lead_name] = _column(signal.seq_data)
+    metadata = {"record_name": record.record_name, "lead_names": record.lead_names, "fs": record.time.fs}
+    return pa.table(columns, metadata={METADATA_KEY: json.dumps(metadata)})
+
+
+def record_from_arrow(table, annotations=None):
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b"{}"))
+    lead_names = metadata.get("lead_names", [name for name in table.column_names if name != "time"])
+    time = Time(time_stamps=np.asarray(_array(table.column("time"))))
+    if metadata.get("fs") is not None:
+        time.fs = metadata["fs"]
+        time.samples = table.num_rows
+    record = ECGRecord(metadata.get("record_name", "arrow"), time)
+    for lead_name in lead_names:
+        record.add_signal(Signal.from_array(_array(table.column(lead_name)), lead_name))
+    if annotations is not None:
+        record.annotations = annotations_from_arrow(annotations)
+    return record
+
+
+def annotations_to_arrow(annotations):
+    pa = _pyarrow()
+    # the label dictionary is built in numpy, Arrow only receives the codes and the few distinct labels
+    uniques, codes = np.unique(annotations.labels.astype(str), return_inverse=True)
+    labels = pa.DictionaryArray.from_arrays(pa.array(codes.astype(np.int32)), pa.array(uniques.tolist(), pa.string()))
+    return pa.table({"index": pa.array(annotations.indices), "label": labels})
+
+
+def _labels(column):
+    pa = _pyarrow()
+    if not pa.types.is_dictionary(column.type):
+        return np.asarray(column.to_numpy(), dtype=str)
+    # decoded per chunk through its dictionary, no Arrow string is built per row
+    chunks = [np.asarray(chunk.dictionary.to_pylist(), dtype=str)[chunk.indices.to_numpy(zero_copy_only=False)]
+              for chunk in column.chunks]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=str)
+
+
+def annotations_from_arrow(table):
+    return ECGAnnotation.from_arrays(np.asarray(_array(table.column("index"))), _labels(table.column("label")))
+
+
+class CorpusWriter:
+    # appends records to one Parquet file or Arrow IPC stream, tagged by a ``record_id`` ordinal, unique per written
+    # record, the dictionary-encoded ``record`` name and the record's JSON ``metadata``
+
+    def __init__(self, path, annotations_path=None, format="parquet", row_group_size=ROW_GROUP_SIZE):
+        if format not in FORMATS:
+            raise ValueError(f"format should be one of {FORMATS}: {format}")
+        self.path = path
+        self.annotations_path = annotations_path
+        self.format = format
+        self.row_group_size = row_group_size
+        self._writers = {}
+        self._written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _tagged(self, table, record_id, record_name):
+        pa = _pyarrow()
+        zeros = pa.array(np.zeros(table.num_rows, dtype=np.int32))
+        ordinal = pa.array(np.full(table.num_rows, record_id, dtype=np.int32))
+        metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+        table = table.replace_schema_metadata(None)
+        if metadata is not None:
+            # per-record metadata (fs, lead names, ...) rides along as a one-entry dictionary, like the name
+            tag = pa.DictionaryArray.from_arrays(zeros, pa.array([metadata.decode()]))
+            table = table.add_column(0, "metadata", tag)
+        name = pa.DictionaryArray.from_arrays(zeros, pa.array([record_name]))
+        return table.add_column(0, "record", name).add_column(0, "record_id", ordinal)
+
+    def _write(self, key, path, table):
+        writer, schema = self._writers.get(key, (None, table.schema))
+        if writer is None:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                import pyarrow.ipc as ipc
+                # the stream format allows the ``record`` dictionary to change from batch to batch
+                writer = ipc.new_stream(path, table.schema)
+            self._writers[key] = writer, schema
+        if not table.schema.equals(schema):
+            raise ValueError(f"Schema mismatch in {path}: {table.schema} != {schema}")
+        if self.format == "parquet":
+            writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def write(self, record):
+        record_id = self._written
+        self._write("signals", self.path, self._tagged(record_to_arrow(record), record_id, record.record_name))
+        if self.annotations_path is not None and record.annotations is not None:
+            annotations = self._tagged(annotations_to_arrow(record.annotations), record_id, record.record_name)
+            self._write("annotations", self.annotations_path, annotations)
+        self._written += 1
+
+    def close(self):
+        for writer, _ in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def write_corpus(records, path, annotations_path=None, format="parquet", row_group_size=ROW_GROUP_SIZE):
+    with CorpusWriter(path, annotations_path=annotations_path, format=format, row_group_size=row_group_size) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def _read_table(path, format):
+    if format not in FORMATS:
+        raise ValueError(f"format should be one of {FORMATS}: {format}")
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path)
+    import pyarrow.ipc as ipc
+    with ipc.open_stream(path) as reader:
+        return reader.read_all()
+
+
+def _chunk_offsets(column):
+    return np.cumsum([0] + [len(chunk) for chunk in column.chunks])
+
+
+def _first(column, offsets, position):
+    # value at ``position`` of a dictionary-encoded column, looked up through the dictionary of its chunk
+    k = int(np.searchsorted(offsets, position, side="right")) - 1
+    chunk = column.chunks[k]
+    return chunk.dictionary[chunk.indices[position - offsets[k]].as_py()].as_py()
+
+
+def _split(table):
+    # (record_id, record_name, table) per record in file order, runs are found on the integer ordinals
+    ids = table.column("record_id")
+    chunks = [chunk.to_numpy() for chunk in ids.chunks]
+    ids = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+    if len(ids) == 0:
+        return []
+    starts = np.concatenate([[0], np.flatnonzero(ids[1:] != ids[:-1]) + 1]).astype(np.int64)
+    stops = np.append(starts[1:], len(ids))
+    names = table.column("record")
+    name_offsets = _chunk_offsets(names)
+    metadata = table.column("metadata") if "metadata" in table.column_names else None
+    metadata_offsets = _chunk_offsets(metadata) if metadata is not None else None
+    tags = [name for name in ["record_id", "record", "metadata"] if name in table.column_names]
+    parts = []
+    for a, b in zip(starts.tolist(), stops.tolist()):
+        part = table.slice(a, b - a).drop(tags)
+        if metadata is not None:
+            part = part.replace_schema_metadata({METADATA_KEY: _first(metadata, metadata_offsets, a).encode()})
+        parts.append((int(ids[a]), _first(names, name_offsets, a), part))
+    return parts
+
+
+def read_corpus(path, annotations_path=None, format="parquet"):
+    signals = _split(_read_table(path, format))
+    annotations = {}
+    if annotations_path is not None:
+        annotations = {record_id: table for record_id, _, table in _split(_read_table(annotations_path, format))}
+    records = []
+    for record_id, record_name, table in signals:
+        record = record_from_arrow(table, annotations=annotations.get(record_id))
+        record.record_name = record_name
+        records.append(record)
+    return records
@@ -0,0 +1,171 @@
+import numpy as np
+
+from pyecg.annotations import BEAT_LABELS
+
+
+class BeatClusters:
+    templates = None
+    assignment = None
+
+    def __init__(self, templates, assignment, annotation_index, samples, labels, shifts, fs, pre):
+        self.templates = templates  # (n_clusters, n_sig, window), mean aligned beat of each cluster
+        self.assignment = assignment  # cluster of each beat, clusters are ordered by size
+        self.annotation_index = annotation_index
+        self.samples = samples
+        self.labels = labels
+        self.shifts = shifts  # lag in samples that aligns each beat with its cluster template
+        self.fs = fs
+        self.pre = pre
+
+    def __repr__(self):
+        return f"BeatClusters {len(self)} clusters over {len(self.assignment)} beats: {self.counts.tolist()}"
+
+    def __len__(self):
+        return len(self.templates)
+
+    @property
+    def counts(self):
+        return np.bincount(self.assignment, minlength=len(self))
+
+    def members(self, cluster):
+        return self.annotation_index[self.assignment == cluster]
+
+    def label_counts(self, cluster):
+        values, counts = np.unique(self.labels[self.assignment == cluster], return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+
+class BeatClusterer:
+    def __init__(self, window=(0.25, 0.4), max_shift=0.05, threshold=0.9, merge_threshold=0.95, labels=None,
+                 batch_size=4096):
+        self.window = window
+        self.max_shift = max_shift
+        self.threshold = threshold
+        self.merge_threshold = merge_threshold
+        self.labels = labels
+        self.batch_size = batch_size
+
+    def _beats(self, annotations):
+        labels = annotations.labels
+        keep = np.isin(labels, BEAT_LABELS) if self.labels is None else np.isin(labels, self.labels)
+        return np.flatnonzero(keep), annotations.indices[keep], labels[keep]
+
+    @staticmethod
+    def _windows(signal, centres, offsets):
+        windows = signal[:, centres[:, None] + offsets].transpose(1, 0, 2)  # (batch, n_sig, window)
+        return windows - np.median(windows, axis=2, keepdims=True)
+
+    @staticmethod
+    def _similarity(spectra, energy, templates, n_fft):
+        # normalized cross-correlation of every beat with every template at lags 0..2 * shift, via one batched FFT
+        template_spectra = np.conj(np.fft.rfft(templates, n_fft, axis=2))
+        cross = np.einsum("bsf,msf->bmf", spectra, template_spectra)
+        correlation = np.fft.irfft(cross, n_fft, axis=2)[:, :, :energy.shape[1]]
+        return correlation / np.sqrt(np.maximum(energy, 1e-12))[:, None, :]
+
+    def fit(self, record):
+        if record.annotations is None:
+            raise ValueError(f"Record {record.record_name} has no annotations")
+        fs = record.fs
+        annotation_index, samples, labels = self._beats(record.annotations)
+        pre, post = int(round(self.window[0] * fs)), int(round(self.window[1] * fs))
+        shift = int(round(self.max_shift * fs))
+        length = pre + post + 1
+        # beats too close to either end (or past it, for sliced records) cannot be aligned and are left out
+        complete = (samples - pre - shift >= 0) & (samples + post + shift < len(record))
+        annotation_index, samples, labels = annotation_index[complete], samples[complete], labels[complete]
+        wide_offsets = np.arange(-pre - shift, post + shift + 1)
+        # no wrap-around for lags in [0, 2 * shift] once the transform covers the wide window
+        n_fft = 1 << int(np.ceil(np.log2(len(wide_offsets))))
+
+        signal = record.p_signal.astype(float)
+        n_sig, n_beats = signal.shape[0], len(samples)
+        shifts = np.zeros(n_beats, dtype=np.int64)
+        assignment = np.full(n_beats, -1, dtype=np.int64)
+        unit_sums, sums = np.empty((0, n_sig, length)), np.empty((0, n_sig, length))
+        for start in range(0, n_beats, self.batch_size):
+            batch = slice(start, min(start + self.batch_size, n_beats))
+            wide = self._windows(signal, samples[batch], wide_offsets)
+            spectra = np.fft.rfft(wide, n_fft, axis=2)
+            squares = np.concatenate([np.zeros((len(wide), 1)), np.cumsum((wide ** 2).sum(axis=1), axis=1)], axis=1)
+            energy = squares[:, length:length + 2 * shift + 1] - squares[:, :2 * shift + 1]
+
+            batch_assignment = np.full(len(wide), -1, dtype=np.int64)
+            lag = np.full(len(wide), shift, dtype=np.int64)
+            if len(unit_sums):
+                templates = unit_sums / np.linalg.norm(unit_sums, axis=(1, 2), keepdims=True)
+                similarity = self._similarity(spectra, energy, templates, n_fft)
+                best_lag = np.argmax(similarity, axis=2)
+                similarity = np.take_along_axis(similarity, best_lag[:, :, None], axis=2)[:, :, 0]
+                best = np.argmax(similarity, axis=1)
+                matched = similarity[np.arange(len(wide)), best] >= self.threshold
+                batch_assignment[matched] = best[matched]
+                lag[matched] = best_lag[matched, best[matched]]
+            # beats matching no template seed new clusters, one seed per loop
+            pending = np.flatnonzero(batch_assignment < 0)
+            seeds = []
+            while len(pending):
+                seed = wide[pending[0], :, shift:shift + length]
+                seed = seed / max(np.linalg.norm(seed), 1e-12)
+                similarity = self._similarity(spectra[pending], energy[pending], seed[None], n_fft)[:, 0]
+                best_lag = np.argmax(similarity, axis=1)
+                joined = similarity[np.arange(len(pending)), best_lag] >= self.threshold
+                joined[0] = True
+                batch_assignment[pending[joined]] = len(unit_sums) + len(seeds)
+                lag[pending[joined]] = best_lag[joined]
+                lag[pending[0]] = shift
+                seeds.append(pending[0])
+                pending = pending[~joined]
+
+            aligned = np.take_along_axis(wide, (lag[:, None] + np.arange(length))[:, None, :], axis=2)
+            units = aligned / np.maximum(np.linalg.norm(aligned, axis=(1, 2), keepdims=True), 1e-12)
+            unit_sums = np.concatenate([unit_sums, np.zeros((len(seeds), n_sig, length))])
+            sums = np.concatenate([sums, np.zeros((len(seeds), n_sig, length))])
+            np.add.at(unit_sums, batch_assignment, units)
+            np.add.at(sums, batch_assignment, aligned)
+            shifts[batch] = lag - shift
+            assignment[batch] = batch_assignment
+
+        counts = np.bincount(assignment, minlength=len(sums))
+        relabel, lags = self._merge(unit_sums, shift)
+        n_clusters = relabel.max() + 1 if len(relabel) else 0
+        merged_sums = np.zeros((n_clusters, n_sig, length))
+        for k, (target, lag) in enumerate(zip(relabel, lags)):
+            # move merged clusters onto their new template, zero-filling the samples shifted in
+            head, tail = max(lag, 0), max(-lag, 0)
+            merged_sums[target, :, head:length - tail] += sums[k, :, tail:length - head]
+        if n_beats:
+            shifts -= lags[assignment]
+        merged_counts = np.bincount(relabel, weights=counts, minlength=n_clusters) if len(relabel) else np.zeros(0)
+        order = np.argsort(-merged_counts, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        templates = merged_sums[order] / np.maximum(merged_counts[order], 1)[:, None, None]
+        assignment = rank[relabel[assignment]] if n_beats else assignment
+        return BeatClusters(templates, assignment, annotation_index, samples, labels, shifts, fs, pre)
+
+    def _merge(self, unit_sums, shift):
+        # union of clusters whose templates correlate above merge_threshold at some lag within +-shift,
+        # returns the merged label and the lag of each cluster against the root it was merged into
+        if len(unit_sums) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        length = unit_sums.shape[2]
+        templates = unit_sums / np.linalg.norm(unit_sums, axis=(1, 2), keepdims=True)
+        n_fft = 1 << int(np.ceil(np.log2(2 * length)))
+        spectra = np.fft.rfft(templates, n_fft, axis=2)
+        correlation = np.fft.irfft(np.einsum("isf,jsf->ijf", spectra, np.conj(spectra)), n_fft, axis=2)
+        lags = np.arange(-shift, shift + 1)
+        correlation = correlation[:, :, lags % n_fft]
+        best_lag = lags[np.argmax(correlation, axis=2)]
+        similarity = correlation.max(axis=2)
+        parent = np.arange(len(templates))
+        for i, j in zip(*np.nonzero(np.triu(similarity >= self.merge_threshold, k=1))):
+            root_i, root_j = i, j
+            while parent[root_i] != root_i:
+                root_i = parent[root_i]
+            while parent[root_j] != root_j:
+                root_j = parent[root_j]
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+        for i in range(len(parent)):
+            parent[i] = parent[parent[i]]
+        return np.unique(parent, return_inverse=True)[1], best_lag[parent, np.arange(len(parent))]
@@ -4,12 +4,18 @@ from typing import List
 import numpy as np
 
 from pyecg.annotations import ECGAnnotation
+from pyecg.segmented import SegmentedArray
 
 
 def is_monotonic_increasing(x):
     return np.all(np.diff(x) > 0)
 
 
+# relative tolerance absorbing float error of k * (1 / fs) when mapping seconds back to indices, it scales with the
+# magnitude of the times involved so that it still holds for week-long records
+INDEX_TOLERANCE = 1e-12
+
+
 class SubjectInfo:
     sex = None  # 1=male, 2=female
     race = None  # 1=white, 2=black, 3=oriental
@@ -40,6 +46,9 @@ class Sequence:
     def __iter__(self):
         return iter(self.seq_data)
 
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.seq_data, dtype=dtype)
+
 
 class Time(Sequence):
     fs = None
@@ -61,6 +70,60 @@ class Time(Sequence):
         if time_stamps is not None:
             self.seq_data = time_stamps
 
+    @property
+    def is_uniform(self):
+        return self.fs is not None
+
+    def slice(self, slice_):
+        new_instance = super().slice(slice_)
+        if self.fs is None:
+            return new_instance
+        step = slice_.step if isinstance(slice_, slice) else None
+        if not isinstance(slice_, slice) or (step is not None and step < 0):
+            new_instance.fs = None
+            new_instance.samples = None
+            return new_instance
+        if step is not None:
+            new_instance.fs = self.fs / step
+        new_instance.samples = len(new_instance)
+        return new_instance
+
+    def searchsorted(self, t, side="left"):
+        if side not in ("left", "right"):
+            raise ValueError(f"side should be 'left' or 'right': {side}")
+        t = np.asarray(t, dtype=float)
+        if self.fs is None:
+            return np.searchsorted(self.seq_data, t, side=side)
+        if len(self) == 0:
+            return np.zeros(t.shape, dtype=np.int64)
+        position = (t - self.seq_data[0]) * self.fs
+        tolerance = INDEX_TOLERANCE * ((np.abs(t) + abs(self.seq_data[0])) * self.fs + 1)
+        rounded = np.rint(position)
+        position = np.where(np.abs(position - rounded) <= tolerance, rounded, position)
+        if side == "left":
+            index = np.ceil(position)
+        else:
+            index = np.floor(position) + 1
+        return np.clip(index, 0, len(self)).astype(np.int64)
+
+    def nearest_index(self, t):
+        if len(self) == 0:
+            raise IndexError("nearest_index on empty time")
+        t = np.asarray(t, dtype=float)
+        if self.fs is not None:
+            index = np.rint((t - self.seq_data[0]) * self.fs)
+            return np.clip(index, 0, len(self) - 1).astype(np.int64)
+        right = np.clip(np.searchsorted(self.seq_data, t, side="left"), 0, len(self) - 1)
+        left = np.clip(right - 1, 0, len(self) - 1)
+        closer_left = np.abs(t - self.seq_data[left]) <= np.abs(self.seq_data[right] - t)
+        return np.where(closer_left, left, right).astype(np.int64)
+
+    def index_between(self, t0, t1):
+        t0, t1 = np.broadcast_arrays(np.asarray(t0, dtype=float), np.asarray(t1, dtype=float))
+        if np.any(t1 < t0):
+            raise ValueError("t1 should not be earlier than t0")
+        return self.searchsorted(t0, side="left"), self.searchsorted(t1, side="left")
+
     @classmethod
     def from_fs_samples(cls, fs, samples):
         return cls(fs=fs, samples=samples)
@@ -69,7 +132,7 @@ class Time(Sequence):
     def from_timestamps(cls, time_stamps):
         if not is_monotonic_increasing(time_stamps):
             raise ValueError("Timestamps are not monotonically increasing")
-        return cls(time_stamps=time_stamps)
+        return cls(time_stamps=np.asarray(time_stamps))
 
 
 class Signal(Sequence):
@@ -87,6 +150,47 @@ class Signal(Sequence):
             self.seq_data = signal
         self.lead_name = lead_name
 
+    @classmethod
+    def from_array(cls, array, lead_name):
+        # keeps the buffer as-is (no list conversion), e.g. for views into shared or mapped memory
+        new_instance = cls([], lead_name)
+        new_instance.seq_data = array
+        return new_instance
+
+
+class DerivedSignal(Signal):
+    transform = None
+    sources = None
+    row = None
+
+    def __init__(self, transform, lead_name, sources):
+        if len(sources) != len(transform.source_leads):
+            raise ValueError(f"Expected {len(transform.source_leads)} source signals, got {len(sources)}")
+        self.transform = transform
+        self.lead_name = lead_name
+        self.row = transform.target_leads.index(lead_name)
+        self.sources = list(sources)
+
+    @property
+    def seq_data(self):
+        return self.transform.apply(self.sources, rows=[self.row])[0]
+
+    @property
+    def group_key(self):
+        return id(self.transform), tuple(id(s) for s in self.sources)
+
+    def __getitem__(self, item):
+        return self.transform.apply(self.sources, item, rows=[self.row])[0]
+
+    def __len__(self):
+        return len(self.sources[0])
+
+    def with_sources(self, sources):
+        return DerivedSignal(self.transform, self.lead_name, sources)
+
+    def slice(self, slice_):
+        return self.with_sources([s.slice(slice_) for s in self.sources])
+
 
 class ECGRecord:
     time: Time = None
@@ -106,13 +210,33 @@ class ECGRecord:
     def duration(self):
         return max(self.time)
 
+    @property
+    def fs(self):
+        if self.time.fs is not None:
+            return self.time.fs
+        if len(self) < 2:
+            return None
+        return 1 / np.median(np.diff(np.asarray(self.time, dtype=float)))
+
     @property
     def n_sig(self):
         return len(self._signals)
 
     @property
     def p_signal(self):
-        return np.array([s for s in self._signals])
+        rows = [None] * self.n_sig
+        derived_groups = {}
+        for i, s in enumerate(self._signals):
+            if isinstance(s, DerivedSignal):
+                derived_groups.setdefault(s.group_key, []).append(i)
+            else:
+                rows[i] = np.asarray(s)
+        for indices in derived_groups.values():
+            first = self._signals[indices[0]]
+            values = first.transform.apply(first.sources, rows=[self._signals[i].row for i in indices])
+            for i, v in zip(indices, values):
+                rows[i] = v
+        return np.array(rows)
 
     @property
     def lead_names(self):
@@ -131,6 +255,21 @@ class ECGRecord:
             raise ValueError(f"len(signal) has {len(signal)} samples != len(timestamps) = {len(self.time)}")
         self._signals.append(signal)
 
+    def add_derived_leads(self, transform):
+        sources = [self.get_lead(name) for name in transform.source_leads]
+        missing = [name for name, s in zip(transform.source_leads, sources) if s is None]
+        if missing:
+            raise ValueError(f"Source leads {missing} are not in record {self.record_name}")
+        for lead_name in transform.target_leads:
+            derived = DerivedSignal(transform, lead_name, sources)
+            if len(derived) != len(self):
+                raise ValueError(f"Derived lead {lead_name} has {len(derived)} samples != {len(self)}")
+            lead_names = self.lead_names
+            if lead_name in lead_names:
+                self._signals[lead_names.index(lead_name)] = derived
+            else:
+                self._signals.append(derived)
+
     def __len__(self):
         return len(self.time)
 
@@ -140,9 +279,74 @@ class ECGRecord:
     def __getitem__(self, item):
         new_instance = copy.copy(self)
         new_instance.time = new_instance.time.slice(item)
-        new_instance._signals = [s.slice(item) for s in new_instance._signals]
+        sliced = {}
+
+        def slice_signal(signal):
+            # derived leads are rebound to the sliced copies of their sources so they stay grouped
+            if id(signal) not in sliced:
+                if isinstance(signal, DerivedSignal):
+                    sliced[id(signal)] = signal.with_sources([slice_signal(s) for s in signal.sources])
+                else:
+                    sliced[id(signal)] = signal.slice(item)
+            return sliced[id(signal)]
+
+        new_instance._signals = [slice_signal(s) for s in new_instance._signals]
+        return new_instance
+
+    def window(self, start, stop):
+        # samples [start, stop) with the annotations inside them, re-indexed to the window (plain slicing keeps the
+        # parent's annotations)
+        new_instance = self[start:stop]
+        if self.annotations is not None:
+            new_instance.annotations = self.annotations.window(start, stop)
         return new_instance
 
+    def at(self, t):
+        # a one-sample record, so time and leads stay sequences
+        index = int(self.time.nearest_index(t))
+        return self.window(index, index + 1)
+
+    def at_many(self, t):
+        index = self.time.nearest_index(t)
+        return np.array([np.asarray(s)[index] for s in self._signals])
+
+    def between(self, t0, t1):
+        start, stop = self.time.index_between(t0, t1)
+        return self.window(int(start), int(stop))
+
+    def between_many(self, t0, t1):
+        start, stop = self.time.index_between(t0, t1)
+        start, stop = np.atleast_1d(start).tolist(), np.atleast_1d(stop).tolist()
+        windows = [self[a:b] for a, b in zip(start, stop)]
+        if self.annotations is not None:
+            for window, annotations in zip(windows, self.annotations.windows(start, stop)):
+                window.annotations = annotations
+        return windows
+
+    def map_leads(self, func, executor="serial", max_workers=None, chunk_size=None, in_place=False,
+                  return_timings=False):
+        from pyecg.parallel import map_leads
+        record, timings = map_leads(self, func, executor=executor, max_workers=max_workers, chunk_size=chunk_size,
+                                    in_place=in_place)
+        return (record, timings) if return_timings else record
+
+    def fingerprint(self, chunk_size=None):
+        from pyecg.fingerprint import fingerprint, CHUNK_SIZE
+        return fingerprint(self, chunk_size=chunk_size or CHUNK_SIZE)
+
+    def psd(self, nperseg=256, noverlap=None):
+        from pyecg.spectral import record_psd
+        return record_psd(self, nperseg=nperseg, noverlap=noverlap)
+
+    def to_arrow(self):
+        from pyecg.arrow import record_to_arrow
+        return record_to_arrow(self)
+
+    @classmethod
+    def from_arrow(cls, table, annotations=None):
+        from pyecg.arrow import record_from_arrow
+        return record_from_arrow(table, annotations=annotations)
+
     @classmethod
     def from_wfdb(cls, hea_file):
         from pyecg.importers import WFDBLoader
@@ -150,11 +354,76 @@ class ECGRecord:
         return loader.load(hea_file)
 
     @classmethod
-    def from_ishine(cls, ecg_file):
+    def from_ishine(cls, ecg_file, derive_limb_leads=False):
         from pyecg.importers import ISHINELoader
-        loader = ISHINELoader()
+        loader = ISHINELoader(derive_limb_leads=derive_limb_leads)
         return loader.load(ecg_file)
 
+    @classmethod
+    def from_edf(cls, edf_file, channels=None, start=None, stop=None):
+        from pyecg.importers import EDFLoader
+        loader = EDFLoader(channels=channels, start=start, stop=stop)
+        return loader.load(edf_file)
+
+    @classmethod
+    def from_aecg(cls, xml_file, derived=False):
+        from pyecg.importers import AECGLoader
+        loader = AECGLoader(derived=derived)
+        return loader.load(xml_file)
+
+    @classmethod
+    def concat(cls, records, name=None, gaps=None):
+        records = list(records)
+        if not records:
+            raise ValueError("concat needs at least one record")
+        lead_names = records[0].lead_names
+        for record in records[1:]:
+            if record.lead_names != lead_names:
+                raise ValueError(f"Lead names differ: {record.lead_names} != {lead_names}")
+        gaps = np.zeros(len(records) - 1) if gaps is None else np.asarray(gaps, dtype=float)
+        if gaps.shape != (len(records) - 1,):
+            raise ValueError(f"gaps should have {len(records) - 1} entries, got {gaps.shape}")
+        if np.any(gaps < 0):
+            raise ValueError("gaps should not be negative")
+
+        fs_set = set(record.time.fs for record in records)
+        fs = fs_set.pop() if len(fs_set) == 1 else None
+        if fs is not None and not np.any(gaps):
+            time = Time.from_fs_samples(fs, sum(len(record) for record in records))
+            # keeps the time origin of the first record, like the gapped path below
+            time.seq_data = time.seq_data + (records[0].time[0] if len(records[0]) else 0)
+        else:
+            time_segments, start = [], np.asarray(records[0].time)[0]
+            for k, record in enumerate(records):
+                record_time = np.asarray(record.time, dtype=float)
+                time_segments.append(record_time - record_time[0] + start)
+                if record.time.fs is not None:
+                    period = 1 / record.time.fs
+                else:
+                    period = np.median(np.diff(record_time)) if len(record_time) > 1 else 0
+                if k < len(gaps):
+                    start = time_segments[-1][-1] + period + gaps[k]
+            time = Time.from_timestamps(np.concatenate(time_segments))
+
+        new_instance = cls(name if name is not None else records[0].record_name, time)
+        new_instance.info = records[0].info
+        for lead_name in lead_names:
+            # concrete leads contribute their buffers as-is, derived leads stay lazy inside the segments
+            segments = []
+            for record in records:
+                signal = record.get_lead(lead_name)
+                segments.append(signal if isinstance(signal, DerivedSignal) else signal.seq_data)
+            new_instance.add_signal(Signal(SegmentedArray(segments), lead_name))
+
+        annotations, offset = None, 0
+        for record in records:
+            if record.annotations is not None:
+                shifted = record.annotations.shift(offset)
+                annotations = shifted if annotations is None else annotations + shifted
+            offset += len(record)
+        new_instance.annotations = annotations
+        return new_instance
+
     @classmethod
     def from_np_array(cls, name, time, signal_array, signal_names):
         new_instance = cls(name, Time.from_timestamps(time))
@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pyecg.annotations import BEAT_LABELS
+
+
+class FeatureTable:
+    columns = None
+
+    def __init__(self, columns):
+        lengths = set(len(v) for v in columns.values())
+        if len(lengths) > 1:
+            raise ValueError(f"All columns should have the same length: {lengths}")
+        self.columns = dict(columns)
+
+    def __repr__(self):
+        return f"FeatureTable {len(self)} rows: {list(self.columns)}"
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, item):
+        return self.columns[item]
+
+    def __contains__(self, item):
+        return item in self.columns
+
+    def keys(self):
+        return self.columns.keys()
+
+    def select(self, mask):
+        return FeatureTable({k: v[mask] for k, v in self.columns.items()})
+
+
+class BeatFeatureExtractor:
+    def __init__(self, window=(0.25, 0.4), qrs_window=0.06, baseline_window=(-0.2, -0.1),
+                 bands=((0.5, 5), (5, 15), (15, 40)), qrs_threshold=0.15, labels=None, batch_size=4096):
+        self.window = window
+        self.qrs_window = qrs_window
+        self.baseline_window = baseline_window
+        self.bands = [tuple(b) for b in bands]
+        self.qrs_threshold = qrs_threshold
+        self.labels = labels
+        self.batch_size = batch_size
+
+    def _beats(self, annotations):
+        labels = annotations.labels
+        if self.labels is None:
+            keep = np.isin(labels, BEAT_LABELS)
+        else:
+            keep = np.isin(labels, self.labels)
+        annotation_index = np.flatnonzero(keep)
+        return annotation_index, annotations.indices[keep], labels[keep]
+
+    def extract(self, record):
+        if record.annotations is None:
+            raise ValueError(f"Record {record.record_name} has no annotations")
+        fs = record.fs
+        annotation_index, samples, labels = self._beats(record.annotations)
+        # annotations past the end of the signal (e.g. a sliced record) have no beat to describe
+        inside = (samples >= 0) & (samples < len(record))
+        annotation_index, samples, labels = annotation_index[inside], samples[inside], labels[inside]
+        rr = np.diff(samples) / fs
+        pre_rr = np.concatenate([[np.nan], rr])
+        post_rr = np.concatenate([rr, [np.nan]])
+
+        pre, post = int(round(self.window[0] * fs)), int(round(self.window[1] * fs))
+        offsets = np.arange(-pre, post + 1)
+        qrs_half = int(round(self.qrs_window * fs))
+        qrs = slice(pre - qrs_half, pre + qrs_half + 1)
+        baseline = slice(pre + int(round(self.baseline_window[0] * fs)),
+                         pre + int(round(self.baseline_window[1] * fs)))
+        if not 0 <= baseline.start < baseline.stop <= len(offsets) or qrs.start < 0 or qrs.stop > len(offsets):
+            raise ValueError("qrs_window and baseline_window should lie inside window")
+        taper = np.hanning(len(offsets))
+        frequencies = np.fft.rfftfreq(len(offsets), 1 / fs)
+        band_masks = [(frequencies >= lo) & (frequencies < hi) for lo, hi in self.bands]
+
+        signal = record.p_signal.astype(float)
+        n_sig, n_beats = signal.shape[0], len(samples)
+        features = {name: np.full((n_sig, n_beats), np.nan) for name in ["r_amplitude", "qrs_width", "baseline"]}
+        energies = np.full((len(self.bands), n_sig, n_beats), np.nan)
+        for start in range(0, n_beats, self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            positions = np.clip(samples[batch, None] + offsets, 0, len(record) - 1)
+            windows = signal[:, positions]  # (n_sig, batch, window)
+            local_baseline = np.median(windows[:, :, baseline], axis=2)
+            deviation = windows - local_baseline[:, :, None]
+            qrs_deviation = deviation[:, :, qrs]
+            peak = np.argmax(np.abs(qrs_deviation), axis=2)
+            r_amplitude = np.take_along_axis(qrs_deviation, peak[:, :, None], axis=2)[:, :, 0]
+            above = np.abs(qrs_deviation) >= self.qrs_threshold * np.abs(r_amplitude)[:, :, None]
+            first = np.argmax(above, axis=2)
+            last = above.shape[2] - 1 - np.argmax(above[:, :, ::-1], axis=2)
+            spectrum = np.abs(np.fft.rfft(deviation * taper, axis=2)) ** 2 / len(offsets)
+
+            features["baseline"][:, batch] = local_baseline
+            features["r_amplitude"][:, batch] = r_amplitude
+            features["qrs_width"][:, batch] = (last - first + 1) / fs
+            for k, mask in enumerate(band_masks):
+                energies[k][:, batch] = spectrum[:, :, mask].sum(axis=2)
+
+        # windows cut off by either end of the record are left as NaN rather than measured on clipped samples
+        truncated = (samples - pre < 0) | (samples + post >= len(record))
+        for values in list(features.values()) + list(energies):
+            values[:, truncated] = np.nan
+
+        columns = {"annotation_index": annotation_index, "sample": samples, "label": labels,
+                   "pre_rr": pre_rr[:n_beats], "post_rr": post_rr[:n_beats]}
+        for i, lead_name in enumerate(record.lead_names):
+            for name, values in features.items():
+                columns[f"{lead_name}_{name}"] = values[i]
+            for (lo, hi), values in zip(self.bands, energies):
+                columns[f"{lead_name}_energy_{lo:g}_{hi:g}hz"] = values[i]
+        return FeatureTable(columns)
+
+    def extract_many(self, records, max_workers=None):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_extract, [self] * len(records), records))
+
+
+def _extract(extractor, record):
+    from pyecg.shared import SharedRecord, SharedRecordHandle
+    if isinstance(record, SharedRecordHandle):
+        with SharedRecord.attach(record) as shared:
+            return extractor.extract(shared.record)
+    return extractor.extract(record)
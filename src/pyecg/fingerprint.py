@@ -0,0 +1,193 @@
+import hashlib
+from collections import namedtuple, Counter
+from itertools import combinations
+
+import numpy as np
+
+from pyecg.quality import window_view
+
+CHUNK_SIZE = 1 << 18
+DIGEST_SIZE = 16
+SKETCH_RATE = 8  # one shingle in SKETCH_RATE, picked by hash value, goes into the sketch
+
+Duplicate = namedtuple("Duplicate", ["first", "second", "kind", "score", "offset"])
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
+
+def _mix(values):
+    # splitmix64 finaliser, the raw shingle hashes are polynomial sums whose low bits are poorly mixed
+    values = values.astype(np.uint64)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def sketch(shingles, rate=SKETCH_RATE):
+    # content-defined sampling: a shingle is kept in every record that has it, so containment carries over
+    return shingles[_mix(shingles) % np.uint64(rate) == 0]
+
+
+class Fingerprint:
+    exact = None
+    coarse = None
+
+    def __init__(self, exact, coarse, shingles, anchors):
+        self.exact = exact
+        self.coarse = coarse
+        self.shingles = shingles  # sorted unique shingle hashes
+        self.anchors = anchors  # sample position of each shingle
+        self.sketch = sketch(shingles)
+
+    def __repr__(self):
+        return f"Fingerprint {self.exact} ({len(self.shingles)} shingles)"
+
+    def __eq__(self, other):
+        return isinstance(other, Fingerprint) and self.exact == other.exact
+
+    def __hash__(self):
+        return hash(self.exact)
+
+    def containment(self, other):
+        if len(self.shingles) == 0 or len(other.shingles) == 0:
+            return 0.0
+        common = np.intersect1d(self.shingles, other.shingles, assume_unique=True)
+        return len(common) / min(len(self.shingles), len(other.shingles))
+
+    def offset(self, other):
+        # sample offset of ``other`` inside ``self``, voted over the shingles both share
+        common, mine, theirs = np.intersect1d(self.shingles, other.shingles, assume_unique=True,
+                                              return_indices=True)
+        if len(common) == 0:
+            return None
+        values, counts = np.unique(self.anchors[mine] - other.anchors[theirs], return_counts=True)
+        return int(values[np.argmax(counts)])
+
+
+class FingerprintBuilder:
+    def __init__(self, fs, lead_names, resolution=0.01, anchor_radius=0.2, shingle_length=0.5):
+        self.fs = fs
+        self.lead_names = list(lead_names)
+        self.n_sig = len(self.lead_names)
+        self.resolution = resolution
+        self.radius = max(int(round(anchor_radius * fs)), 1)
+        self.length = max(int(round(shingle_length * fs)), 1)
+        self.n_samples = 0
+        self._lead_hashes = [hashlib.blake2b(f"{lead_name}\x00".encode("utf-8"), digest_size=DIGEST_SIZE)
+                             for lead_name in self.lead_names]
+        self._time_hash = None
+        self._annotation_hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        self._weights = np.random.RandomState(0).randint(1, 2 ** 62, size=self.length, dtype=np.int64) \
+            .astype(np.uint64) | np.uint64(1)
+        self._tail = np.empty(0, dtype=np.int64)
+        self._tail_start = 0
+        self._shingles, self._anchors = [], []
+
+    def update(self, block, time_stamps=None):
+        block = np.ascontiguousarray(block, dtype=np.float64).reshape(self.n_sig, -1)
+        for h, row in zip(self._lead_hashes, block):
+            h.update(row.tobytes())
+        if time_stamps is not None:
+            if self._time_hash is None:
+                self._time_hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            self._time_hash.update(np.ascontiguousarray(time_stamps, dtype=np.float64).tobytes())
+        if self.n_sig > 0:
+            self._update_shingles(np.rint(block[0] / self.resolution).astype(np.int64))
+        self.n_samples += block.shape[1]
+
+    def _update_shingles(self, quantized):
+        signal = np.concatenate([self._tail, quantized])
+        # a window can only be judged once its centre has a full shingle after it
+        usable = min(len(signal), len(signal) - self.length + self.radius + 1)
+        if usable >= 2 * self.radius + 1:
+            # anchors are samples that are the (first) maximum of the window centred on them
+            centred = window_view(signal[None, :usable], 2 * self.radius + 1, 1)[0]
+            candidates = np.flatnonzero(np.argmax(centred, axis=1) == self.radius) + self.radius
+            if len(candidates):
+                shingles = window_view(signal[None, :], self.length, 1)[0][candidates]
+                self._shingles.append(shingles.astype(np.uint64) @ self._weights)
+                self._anchors.append(candidates + self._tail_start)
+            consumed = len(centred)
+        else:
+            consumed = 0
+        self._tail = signal[consumed:]
+        self._tail_start += consumed
+
+    def add_annotations(self, indices, labels):
+        self._annotation_hash.update(np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+        self._annotation_hash.update("\x00".join(str(label) for label in labels).encode("utf-8"))
+
+    def fingerprint(self):
+        if self._time_hash is None:
+            time_spec = f"fs={float(self.fs)!r};n={self.n_samples}".encode()
+        else:
+            time_spec = self._time_hash.digest()
+        exact = _digest(time_spec, *[h.digest() for h in self._lead_hashes], self._annotation_hash.digest())
+        shingles = np.concatenate(self._shingles) if self._shingles else np.empty(0, dtype=np.uint64)
+        anchors = np.concatenate(self._anchors) if self._anchors else np.empty(0, dtype=np.int64)
+        shingles, first = np.unique(shingles, return_index=True)
+        # the coarse key is the layout only, records of different layouts are never compared
+        coarse = _digest(f"fs={float(self.fs):.3f};n_sig={self.n_sig}".encode())
+        return Fingerprint(exact, coarse, shingles, anchors[first])
+
+
+def fingerprint(record, chunk_size=CHUNK_SIZE, **kwargs):
+    builder = FingerprintBuilder(record.fs, record.lead_names, **kwargs)
+    n = len(record)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = np.array([np.asarray(s[start:stop], dtype=np.float64) for s in record._signals])
+        time_stamps = None if record.time.is_uniform else np.asarray(record.time)[start:stop]
+        builder.update(block.reshape(-1, stop - start), time_stamps=time_stamps)
+    if record.annotations is not None:
+        builder.add_annotations(record.annotations.indices, record.annotations.labels)
+    return builder.fingerprint()
+
+
+def candidate_pairs(fingerprints, min_containment=0.8):
+    # inverted index over the sketches, only records that share sketched shingles are ever paired
+    fingerprints = list(fingerprints)
+    sketches = [f.sketch for f in fingerprints]
+    keys = np.concatenate(sketches) if sketches else np.empty(0, dtype=np.uint64)
+    owners = np.repeat(np.arange(len(sketches)), [len(k) for k in sketches])
+    order = np.argsort(keys, kind="stable")
+    keys, owners = keys[order], owners[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.empty(0, int)
+    stops = np.append(starts[1:], len(keys))
+    shared = Counter()
+    for start, stop in zip(starts[stops - starts > 1], stops[stops - starts > 1]):
+        shared.update(combinations(owners[start:stop].tolist(), 2))
+    # the sketch estimate is noisy, so pairs are kept at half the containment asked for and checked in full later
+    return sorted((i, j) for (i, j), count in shared.items()
+                  if count >= 0.5 * min_containment * min(len(sketches[i]), len(sketches[j])))
+
+
+def find_duplicates(records, min_containment=0.8, **kwargs):
+    fingerprints = [r if isinstance(r, Fingerprint) else fingerprint(r, **kwargs) for r in records]
+    copies = {}
+    for i, f in enumerate(fingerprints):
+        copies.setdefault(f.exact, []).append(i)
+    duplicates = []
+    for members in copies.values():
+        duplicates.extend(Duplicate(i, j, "exact", 1.0, 0) for i, j in combinations(members, 2))
+    # exact copies are indexed once and their overlaps are reported for every copy, candidates are only looked
+    # for inside a coarse bucket
+    buckets = {}
+    for members in copies.values():
+        buckets.setdefault(fingerprints[members[0]].coarse, []).append(members[0])
+    for representatives in buckets.values():
+        for a, b in candidate_pairs([fingerprints[i] for i in representatives], min_containment=min_containment):
+            first, second = fingerprints[representatives[a]], fingerprints[representatives[b]]
+            score = first.containment(second)
+            if score >= min_containment:
+                offset = first.offset(second)
+                for i in copies[first.exact]:
+                    for j in copies[second.exact]:
+                        duplicates.append(Duplicate(i, j, "overlap", score, offset) if i < j else
+                                          Duplicate(j, i, "overlap", score, -offset))
+    return sorted(duplicates)
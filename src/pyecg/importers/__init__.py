@@ -1,3 +1,6 @@
 from .importer import Importer
 from .ishine import ISHINELoader
 from .wfdb import WFDBLoader
+from .stream import StreamLoader
+from .edf import EDFLoader
+from .aecg import AECGLoader
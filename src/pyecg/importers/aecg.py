@@ -0,0 +1,110 @@
+import base64
+import glob
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample, NORMAL_BEAT, PVC, SUPRAVENTRICULAR_ECTOPIC, \
+    PACED_BEAT, ARTEFACT
+from . import Importer
+
+HL7 = "{urn:hl7-org:v3}"
+LEAD_PREFIX = "MDC_ECG_LEAD_"
+LEAD_NAMES = {"AVR": "aVR", "AVL": "aVL", "AVF": "aVF"}
+TO_MILLIVOLT = {"uV": 1e-3, "mV": 1.0, "V": 1e3}
+TO_SECOND = {"us": 1e-6, "ms": 1e-3, "s": 1.0}
+BEAT_LABELS = {"MDC_ECG_BEAT_NORMAL": NORMAL_BEAT,
+               "MDC_ECG_BEAT_PVC": PVC,
+               "MDC_ECG_BEAT_VPC": PVC,
+               "MDC_ECG_BEAT_SVPC": SUPRAVENTRICULAR_ECTOPIC,
+               "MDC_ECG_BEAT_SVPB": SUPRAVENTRICULAR_ECTOPIC,
+               "MDC_ECG_BEAT_PACED": PACED_BEAT,
+               "MDC_ECG_BEAT_ARTIFACT": ARTEFACT,
+               "MDC_ECG_BEAT_NOISE": ARTEFACT}
+
+
+def decode_digits(digits):
+    if digits.get("representation") == "B64":
+        return np.frombuffer(base64.b64decode("".join((digits.text or "").split())), dtype="<i2").astype(float)
+    return np.fromstring(digits.text or "", dtype=float, sep=" ")
+
+
+class AECGLoader(Importer):
+    def __init__(self, derived=False):
+        # derived=True loads the derived series (median beats) instead of the rhythm series, as a record of its own
+        self.derived = derived
+
+    def load(self, xml_file) -> ECGRecord:
+        if not os.path.isfile(xml_file):
+            raise FileNotFoundError(f"{xml_file} is not found")
+        leads, beats = [], []
+        increments = {False: None, True: None}  # rhythm and derived series each carry their own time sequence
+        derived_depth = 0
+        annotations = []  # stack, beat annotations may nest wave annotations
+        for event, element in ET.iterparse(xml_file, events=("start", "end")):
+            tag = element.tag
+            if tag == f"{HL7}derivedSeries":
+                derived_depth += 1 if event == "start" else -1
+                continue
+            if event == "start":
+                if tag == f"{HL7}annotation":
+                    annotations.append({})
+                continue
+            in_derived = derived_depth > 0
+            if tag == f"{HL7}sequence":
+                code = element.find(f"{HL7}code")
+                value = element.find(f"{HL7}value")
+                code = code.get("code", "") if code is not None else ""
+                if value is not None and code.startswith("TIME_") and increments[in_derived] is None:
+                    step = value.find(f"{HL7}increment")
+                    increments[in_derived] = float(step.get("value")) * TO_SECOND[step.get("unit", "s")]
+                elif value is not None and code.startswith(LEAD_PREFIX) and in_derived == self.derived:
+                    lead_name = code[len(LEAD_PREFIX):]
+                    leads.append((LEAD_NAMES.get(lead_name, lead_name), self._decode_lead(value)))
+                element.clear()
+            elif tag == f"{HL7}annotation" and annotations:
+                annotation = annotations.pop()
+                if "label" in annotation and "time" in annotation and in_derived == self.derived:
+                    beats.append((annotation["time"], annotation["label"]))
+                element.clear()
+            elif annotations and tag == f"{HL7}value" and element.get("code", "") in BEAT_LABELS:
+                annotations[-1]["label"] = BEAT_LABELS[element.get("code")]
+            elif annotations and tag == f"{HL7}low" and "time" not in annotations[-1]:
+                annotations[-1]["time"] = float(element.get("value")) * TO_SECOND[element.get("unit", "s")]
+
+        # a derived series without a time sequence of its own is sampled like the rhythm series
+        increment = increments[self.derived] or increments[False]
+        if increment is None:
+            raise ValueError(f"{xml_file} has no time sequence")
+        lengths = set(len(lead) for _, lead in leads)
+        if len(lengths) > 1:
+            raise ValueError(f"Leads in {xml_file} have different lengths: {sorted(lengths)}")
+        n = lengths.pop() if lengths else 0
+        record_name = os.path.splitext(os.path.basename(xml_file))[0]
+        if self.derived:
+            record_name += "_derived"
+        new_record = ECGRecord(name=record_name, time=Time.from_fs_samples(1 / increment, n))
+        for lead_name, lead in leads:
+            new_record.add_signal(Signal.from_array(lead, lead_name))
+        beats.sort()
+        new_record.annotations = ECGAnnotation([ECGAnnotationSample(int(round(t / increment)), label)
+                                                for t, label in beats if 0 <= round(t / increment) < n])
+        return new_record
+
+    @staticmethod
+    def _decode_lead(value):
+        origin, scale = value.find(f"{HL7}origin"), value.find(f"{HL7}scale")
+        digits = decode_digits(value.find(f"{HL7}digits"))
+        unit = scale.get("unit", "uV") if scale is not None else "uV"
+        origin = float(origin.get("value")) if origin is not None else 0.0
+        scale = float(scale.get("value")) if scale is not None else 1.0
+        return (origin + scale * digits) * TO_MILLIVOLT[unit]
+
+    def load_many(self, xml_files, max_workers=None, chunksize=16):
+        if isinstance(xml_files, str):
+            xml_files = sorted(glob.glob(os.path.join(xml_files, "*.xml")))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.load, xml_files, chunksize=chunksize))
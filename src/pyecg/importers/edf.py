@@ -0,0 +1,224 @@
+import numbers
+import os
+import re
+
+import numpy as np
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.ecg import INDEX_TOLERANCE
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample
+from . import Importer
+
+ANNOTATION_LABEL = "EDF Annotations"
+SIGNAL_FIELDS = [("label", 16), ("transducer", 80), ("physical_dimension", 8), ("physical_min", 8),
+                 ("physical_max", 8), ("digital_min", 8), ("digital_max", 8), ("prefiltering", 80),
+                 ("samples_per_record", 8), ("reserved", 32)]
+TIME_KEEPING = re.compile(rb"([+-]\d+(?:\.\d*)?)\x14")
+ONSET_PREFIX = 16  # samples (32 bytes) read per data record to find its time-keeping onset
+TAL = re.compile(rb"([+-]\d+(?:\.\d*)?)(?:\x15(\d+(?:\.\d*)?))?\x14((?:[^\x00]*?\x14)*)\x00")
+
+
+class EDFHeader:
+    def __init__(self, edf_file):
+        with open(edf_file, "rb") as f:
+            fixed = f.read(256)
+            if len(fixed) < 256:
+                raise ValueError(f"{edf_file} is too short for an EDF header")
+            self.patient = fixed[8:88].decode("ascii", "replace").strip()
+            self.recording = fixed[88:168].decode("ascii", "replace").strip()
+            self.start_date = fixed[168:176].decode("ascii").strip()
+            self.start_time = fixed[176:184].decode("ascii").strip()
+            self.header_bytes = int(fixed[184:192])
+            self.reserved = fixed[192:236].decode("ascii", "replace").strip()
+            self.n_records = int(fixed[236:244])
+            self.record_duration = float(fixed[244:252])
+            ns = int(fixed[252:256])
+            raw = f.read(ns * 256)
+        self.signals = [{} for _ in range(ns)]
+        offset = 0
+        for name, width in SIGNAL_FIELDS:
+            for i in range(ns):
+                value = raw[offset + i * width:offset + (i + 1) * width].decode("ascii", "replace").strip()
+                self.signals[i][name] = value
+            offset += ns * width
+        for s in self.signals:
+            for name in ["physical_min", "physical_max", "digital_min", "digital_max"]:
+                s[name] = float(s[name])
+            s["samples_per_record"] = int(s["samples_per_record"])
+        self.offsets = np.concatenate([[0], np.cumsum([s["samples_per_record"] for s in self.signals])])
+        if self.n_records < 0:
+            data_bytes = os.path.getsize(edf_file) - self.header_bytes
+            self.n_records = data_bytes // (2 * int(self.offsets[-1]))
+
+    @property
+    def is_edf_plus(self):
+        return self.reserved.startswith("EDF+")
+
+    @property
+    def is_discontinuous(self):
+        return self.reserved.startswith("EDF+D")
+
+    @property
+    def labels(self):
+        return [s["label"] for s in self.signals]
+
+
+class EDFChannel:
+    # digital samples of one signal, strided out of the memory-mapped data records and scaled on access
+
+    def __init__(self, records, gain, offset, start=0, stop=None):
+        self.records = records  # (n_records, samples_per_record) view into the mapped file
+        self.gain = gain
+        self.offset = offset
+        self.start = start
+        self.stop = records.size if stop is None else stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def _read(self, start, stop):
+        n = self.records.shape[1]
+        first, last = start // n, -(-stop // n)
+        digital = self.records[first:last].reshape(-1)[start - first * n:stop - first * n]
+        return digital * self.gain + self.offset
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            if item < 0:
+                item += len(self)
+            if not 0 <= item < len(self):
+                raise IndexError(f"index {item} out of range for {len(self)} samples")
+            return self._read(self.start + item, self.start + item + 1)[0]
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step == 1:
+                return self._read(self.start + start, self.start + max(stop, start))
+        return self._read(self.start, self.stop)[item]
+
+
+def _sample_index(record_onsets, n, fs, t):
+    # first sample at or after ``t`` on the time axis of data records starting at ``record_onsets`` (EDF+D has gaps)
+    record = int(np.searchsorted(record_onsets, t, side="right")) - 1
+    if record < 0:
+        return 0
+    position = (t - record_onsets[record]) * fs
+    rounded = np.rint(position)
+    if abs(position - rounded) <= INDEX_TOLERANCE * ((abs(t) + abs(record_onsets[record])) * fs + 1):
+        position = rounded
+    return record * n + int(min(np.ceil(position), n))
+
+
+class EDFLoader(Importer):
+    def __init__(self, channels=None, start=None, stop=None):
+        self.channels = channels
+        self.start = start
+        self.stop = stop
+
+    def load(self, edf_file) -> ECGRecord:
+        if not os.path.isfile(edf_file):
+            raise FileNotFoundError(f"{edf_file} is not found")
+        header = EDFHeader(edf_file)
+        data = np.memmap(edf_file, dtype="<i2", mode="r", offset=header.header_bytes,
+                         shape=(header.n_records, int(header.offsets[-1])))
+
+        labels = header.labels
+        ecg_channels = [i for i, label in enumerate(labels) if label != ANNOTATION_LABEL]
+        if self.channels is not None:
+            missing = [c for c in self.channels if c not in labels]
+            if missing:
+                raise ValueError(f"Channels {missing} are not in {edf_file}")
+            ecg_channels = [labels.index(c) for c in self.channels]
+        if not ecg_channels:
+            raise ValueError(f"No signal channels selected in {edf_file}, available: "
+                             f"{[label for label in labels if label != ANNOTATION_LABEL]}")
+        samples_per_record = set(header.signals[i]["samples_per_record"] for i in ecg_channels)
+        if len(samples_per_record) > 1:
+            raise ValueError(f"Selected channels have different sampling rates: {sorted(samples_per_record)}")
+        n = samples_per_record.pop()
+        fs = n / header.record_duration
+
+        record_onsets = np.arange(header.n_records) * header.record_duration
+        channel = labels.index(ANNOTATION_LABEL) if ANNOTATION_LABEL in labels else None
+        if channel is not None:
+            record_onsets = self._record_onsets(header, data, channel)
+
+        total = header.n_records * n
+        start = 0 if self.start is None else _sample_index(record_onsets, n, fs, self.start)
+        stop = total if self.stop is None else max(_sample_index(record_onsets, n, fs, self.stop), start)
+        # annotation text and timestamps are only built for the data records the window overlaps
+        first, last = start // n, -(-stop // n)
+        annotations = [] if channel is None else self._read_annotations(header, data, channel, first, last)
+
+        if header.is_discontinuous:
+            time_stamps = (record_onsets[first:last, None] + np.arange(n) / fs).reshape(-1)
+            time_stamps = time_stamps[start - first * n:stop - first * n]
+            time = Time.from_timestamps(time_stamps)
+        else:
+            time = Time.from_fs_samples(fs, stop - start)
+            time.seq_data = time.seq_data + (record_onsets[0] if len(record_onsets) else 0) + start / fs
+        record_name = os.path.splitext(os.path.basename(edf_file))[0]
+        new_record = ECGRecord(name=record_name, time=time)
+        for i in ecg_channels:
+            s = header.signals[i]
+            gain = (s["physical_max"] - s["physical_min"]) / (s["digital_max"] - s["digital_min"])
+            offset = s["physical_min"] - s["digital_min"] * gain
+            records = data[:, header.offsets[i]:header.offsets[i + 1]]
+            new_record.add_signal(Signal.from_array(EDFChannel(records, gain, offset, start, stop), s["label"]))
+
+        if header.is_edf_plus:
+            onsets = np.array([onset for onset, _ in annotations], dtype=float)
+            inside = np.zeros(len(onsets), dtype=bool)
+            if len(time) > 0:
+                inside = (onsets >= time[0] - 0.5 / fs) & (onsets < time[len(time) - 1] + 0.5 / fs)
+            indices = time.nearest_index(onsets[inside]) if inside.any() else []
+            labels = [label for (_, label), keep in zip(annotations, inside) if keep]
+            new_record.annotations = ECGAnnotation([ECGAnnotationSample(int(i), label)
+                                                    for i, label in zip(indices, labels)])
+        return new_record
+
+    @staticmethod
+    def _record_onsets(header, data, channel):
+        columns = slice(header.offsets[channel], header.offsets[channel + 1])
+        if header.n_records == 0:
+            return np.empty(0)
+        if not header.is_discontinuous:
+            # EDF(+C) data records are contiguous, the first time-keeping TAL fixes them all
+            return EDFLoader._onset(data[0, columns]) + np.arange(header.n_records) * header.record_duration
+        # EDF+D: only the start of every annotation channel is read, the rest of the records stays untouched
+        width = min(ONSET_PREFIX, header.offsets[channel + 1] - header.offsets[channel])
+        prefixes = np.ascontiguousarray(data[:, header.offsets[channel]:header.offsets[channel] + width])
+        onsets = np.empty(header.n_records)
+        for k, prefix in enumerate(prefixes):
+            match = TIME_KEEPING.match(prefix.tobytes())
+            onsets[k] = float(match.group(1)) if match is not None else EDFLoader._onset(data[k, columns])
+        return onsets
+
+    @staticmethod
+    def _onset(raw):
+        match = TIME_KEEPING.match(raw.tobytes())
+        if match is None:
+            raise ValueError("EDF+ data record without time-keeping annotation")
+        return float(match.group(1))
+
+    @staticmethod
+    def _read_annotations(header, data, channel, first, last):
+        raw = np.ascontiguousarray(data[first:last, header.offsets[channel]:header.offsets[channel + 1]])
+        annotations = []
+        for record in raw:
+            tals = TAL.findall(record.tobytes())
+            if not tals:
+                raise ValueError("EDF+ data record without time-keeping annotation")
+            for k, (onset, _, texts) in enumerate(tals):
+                if k == 0:
+                    texts = texts.split(b"\x14")[1:-1]  # first TAL of a record only keeps time
+                else:
+                    texts = texts.split(b"\x14")[:-1]
+                for text in texts:
+                    annotations.append((float(onset), text.decode("utf-8", "replace")))
+        return annotations
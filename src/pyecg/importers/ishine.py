@@ -5,10 +5,13 @@ from ishneholterlib import Holter
 
 from pyecg import ECGRecord, Time, Signal, SubjectInfo
 from pyecg.annotations import ECGAnnotation, ECGAnnotationSample
+from pyecg.leads import LIMB_LEADS
 from . import Importer
 
 
 class ISHINELoader(Importer):
+    def __init__(self, derive_limb_leads=False):
+        self.derive_limb_leads = derive_limb_leads
 
     def load(self, ecg_file) -> ECGRecord:
         if not os.path.isfile(ecg_file):
@@ -48,8 +51,16 @@ class ISHINELoader(Importer):
         record_name = ".".join(record_name.split(".")[:-1])
         new_record = ECGRecord(name=record_name, time=time)
 
+        lead_names = [str(leadi) for leadi in record.lead]
+        transform = self._limb_leads(lead_names) if self.derive_limb_leads else None
+        derived_leads = transform.target_leads if transform is not None else []
         for leadi in record.lead:
-            new_record.add_signal(Signal(leadi.data, str(leadi)))
+            if str(leadi) not in derived_leads:
+                new_record.add_signal(Signal(leadi.data, str(leadi)))
+        if transform is not None:
+            new_record.add_derived_leads(transform)
+            file_order = {name: i for i, name in enumerate(lead_names)}
+            new_record._signals.sort(key=lambda s: file_order.get(s.lead_name, len(file_order)))
 
         ecg_annotation = ECGAnnotation([ECGAnnotationSample(i["samp_num"], i["ann"]) for i in record.beat_anns])
         new_record.annotations = ecg_annotation
@@ -64,3 +75,11 @@ class ISHINELoader(Importer):
         new_record.info.pm = record.pm
 
         return new_record
+
+    @staticmethod
+    def _limb_leads(lead_names):
+        # only the limb leads the file actually has are virtualized, so both load modes give the same leads
+        targets = [name for name in LIMB_LEADS.target_leads if name in lead_names]
+        if not targets or not set(LIMB_LEADS.source_leads) <= set(lead_names):
+            return None
+        return LIMB_LEADS.restrict(targets)
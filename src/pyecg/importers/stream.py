@@ -0,0 +1,185 @@
+import asyncio
+import inspect
+import os
+import stat
+import struct
+
+import numpy as np
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.live import LiveECGRecord
+from . import Importer
+
+MAGIC = b"ECGF"
+# magic, dtype code, reserved, number of leads, number of samples; payload is sample-major (leads interleaved)
+FRAME_HEADER = struct.Struct("<4sBBHI")
+DTYPES = {0: np.dtype("<i2"), 1: np.dtype("<f4"), 2: np.dtype("<f8")}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+FILE_BUFFER = 1 << 16
+
+
+def encode_frame(block, dtype="<i2"):
+    block = np.asarray(block)
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if block.ndim != 2 or dtype not in DTYPE_CODES:
+        raise ValueError(f"block should be (n_sig, n) with dtype in {list(DTYPE_CODES)}: {block.shape}, {dtype}")
+    payload = np.ascontiguousarray(block.T, dtype=dtype).tobytes()
+    return FRAME_HEADER.pack(MAGIC, DTYPE_CODES[dtype], 0, block.shape[0], block.shape[1]) + payload
+
+
+async def read_frame(reader):
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ValueError(f"Truncated frame header: {len(e.partial)} bytes")
+        return None
+    magic, code, _, n_sig, n_samples = FRAME_HEADER.unpack(header)
+    if magic != MAGIC or code not in DTYPES:
+        raise ValueError(f"Bad frame header: {header!r}")
+    payload = await reader.readexactly(n_samples * n_sig * DTYPES[code].itemsize)
+    return np.frombuffer(payload, dtype=DTYPES[code]).reshape(n_samples, n_sig).T
+
+
+class StreamLoader(Importer):
+    def __init__(self, fs, lead_names, gain=1.0, queue_size=8):
+        self.fs = fs
+        self.lead_names = list(lead_names)
+        self.gain = gain
+        self.queue_size = queue_size
+
+    def _scale(self, block):
+        if block.shape[0] != len(self.lead_names):
+            raise ValueError(f"Frame has {block.shape[0]} leads, expected {len(self.lead_names)}")
+        return block / self.gain if block.dtype.kind == "i" or self.gain != 1.0 else block
+
+    async def consume(self, reader, sink):
+        # the bounded queue makes a slow sink stall the reader, which in turn stops draining the socket
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            try:
+                while True:
+                    block = await read_frame(reader)
+                    await queue.put(block)
+                    if block is None:
+                        return
+            except BaseException:
+                await queue.put(None)
+                raise
+
+        producer = asyncio.ensure_future(produce())
+        n_samples = 0
+        try:
+            while True:
+                block = await queue.get()
+                if block is None:
+                    break
+                block = self._scale(block)
+                result = sink(block)
+                if inspect.isawaitable(result):
+                    await result
+                n_samples += block.shape[1]
+        except BaseException:
+            producer.cancel()
+            raise
+        await producer
+        return n_samples
+
+    async def read_record(self, reader, name="stream"):
+        blocks = []
+        await self.consume(reader, blocks.append)
+        signal = np.concatenate(blocks, axis=1) if blocks else np.empty((len(self.lead_names), 0))
+        record = ECGRecord(name, Time.from_fs_samples(self.fs, signal.shape[1]))
+        for row, lead_name in zip(signal, self.lead_names):
+            record.add_signal(Signal.from_array(row, lead_name))
+        return record
+
+    def load(self, source) -> ECGRecord:
+        async def load():
+            reader, writer = await open_source(source)
+            try:
+                return await self.read_record(reader, name=_source_name(source))
+            finally:
+                if writer is not None:
+                    writer.close()
+                elif isinstance(reader, FileReader):
+                    reader.close()
+        return asyncio.run(load())
+
+
+class LiveStreamServer:
+    def __init__(self, loader, capacity=60.0, on_close=None):
+        self.loader = loader
+        self.capacity = capacity
+        self.on_close = on_close
+        self.records = {}  # streams that are still connected
+        self._server = None
+        self._next_id = 0
+
+    async def _handle(self, reader, writer):
+        stream_id = self._next_id
+        self._next_id += 1
+        live = LiveECGRecord(f"stream_{stream_id}", self.loader.fs, self.loader.lead_names, capacity=self.capacity)
+        self.records[stream_id] = live
+        try:
+            await self.loader.consume(reader, live.append)
+        finally:
+            writer.close()
+            # finished streams are released, ``on_close`` gets a last look at them before that
+            del self.records[stream_id]
+            if self.on_close is not None:
+                self.on_close(stream_id, live)
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path):
+        self._server = await asyncio.start_unix_server(self._handle, path)
+        return path
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+class FileReader:
+    # frames of a regular file, read through the default executor so that disk reads never block the event loop
+    # and only the frame being decoded is in memory
+
+    def __init__(self, path):
+        self._file = open(path, "rb", buffering=FILE_BUFFER)
+
+    async def readexactly(self, n):
+        data = await asyncio.get_running_loop().run_in_executor(None, self._file.read, n)
+        if len(data) < n:
+            raise asyncio.IncompleteReadError(data, n)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def _source_name(source):
+    if isinstance(source, tuple):
+        return f"{source[0]}:{source[1]}"
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+async def open_source(source):
+    if isinstance(source, tuple):
+        return await asyncio.open_connection(*source)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"{source} is not found")
+    mode = os.stat(source).st_mode
+    if stat.S_ISSOCK(mode):
+        return await asyncio.open_unix_connection(source)
+    if stat.S_ISFIFO(mode):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        # opening a FIFO blocks until a writer connects, which has to happen off the event loop
+        pipe = await loop.run_in_executor(None, open, source, "rb")
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        return reader, None
+    return FileReader(source), None
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class LeadTransform:
+    source_leads = None
+    target_leads = None
+    matrix = None
+
+    def __init__(self, source_leads, target_leads, matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.shape != (len(target_leads), len(source_leads)):
+            raise ValueError(f"matrix should have shape {(len(target_leads), len(source_leads))} got {matrix.shape}")
+        self.source_leads = list(source_leads)
+        self.target_leads = list(target_leads)
+        self.matrix = matrix
+
+    def __repr__(self):
+        return f"LeadTransform {self.source_leads} -> {self.target_leads}"
+
+    def restrict(self, target_leads):
+        missing = [name for name in target_leads if name not in self.target_leads]
+        if missing:
+            raise ValueError(f"Target leads {missing} are not in {self.target_leads}")
+        rows = [self.target_leads.index(name) for name in target_leads]
+        return LeadTransform(self.source_leads, target_leads, self.matrix[rows])
+
+    def apply(self, sources, item=None, rows=None):
+        if len(sources) != len(self.source_leads):
+            raise ValueError(f"Expected {len(self.source_leads)} source signals, got {len(sources)}")
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        # only touch the source leads that actually contribute to the requested rows
+        columns = np.flatnonzero(np.any(matrix != 0, axis=0))
+        if item is None:
+            data = np.array([np.asarray(sources[c].seq_data, dtype=float) for c in columns])
+        else:
+            data = np.array([np.asarray(sources[c][item], dtype=float) for c in columns])
+        return np.tensordot(matrix[:, columns], data, axes=1)
+
+
+# Einthoven / Goldberger relations, every limb lead is a linear combination of I and II
+LIMB_LEADS = LeadTransform(["I", "II"],
+                           ["III", "aVR", "aVL", "aVF"],
+                           [[-1.0, 1.0],
+                            [-0.5, -0.5],
+                            [1.0, -0.5],
+                            [-0.5, 1.0]])
+
+# Inverse Dower transform (Edenbrandt & Pahlm 1988), 12-lead ECG to Frank X, Y, Z leads
+INVERSE_DOWER = LeadTransform(["I", "II", "V1", "V2", "V3", "V4", "V5", "V6"],
+                              ["X", "Y", "Z"],
+                              [[0.156, -0.010, -0.172, -0.074, 0.122, 0.231, 0.239, 0.194],
+                               [-0.227, 0.887, 0.057, -0.019, -0.106, -0.022, 0.041, 0.048],
+                               [0.022, 0.102, -0.229, -0.310, -0.246, -0.063, 0.055, 0.108]])
@@ -0,0 +1,118 @@
+import numpy as np
+
+from pyecg.annotations import ECGAnnotation
+from pyecg.ecg import ECGRecord, Signal, Time
+
+
+class _Ring:
+    def __init__(self, shape, dtype):
+        self.buffer = np.zeros(shape, dtype=dtype)
+        self.capacity = shape[-1]
+        self.head = 0
+        self.count = 0
+
+    def write(self, block):
+        m = block.shape[-1]
+        if m >= self.capacity:
+            block = block[..., m - self.capacity:]
+            self.head = (self.head + m - self.capacity) % self.capacity
+        n = block.shape[-1]
+        first = min(n, self.capacity - self.head)
+        self.buffer[..., self.head:self.head + first] = block[..., :first]
+        self.buffer[..., :n - first] = block[..., first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + m, self.capacity)
+
+    def latest(self, n, out=None):
+        n = min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity and out is None:
+            return self.buffer[..., start:start + n]
+        if out is None:
+            out = np.empty(self.buffer.shape[:-1] + (n,), dtype=self.buffer.dtype)
+        out = out[..., :n]
+        first = min(n, self.capacity - start)
+        out[..., :first] = self.buffer[..., start:start + first]
+        out[..., first:] = self.buffer[..., :n - first]
+        return out
+
+
+class LiveECGRecord:
+    record_name: str = None
+    fs = None
+    lead_names = None
+    n_samples = 0
+
+    def __init__(self, name, fs, lead_names, capacity=60.0, annotation_capacity=None, dtype=np.float64,
+                 label_dtype="<U4"):
+        self.record_name = name
+        self.fs = fs
+        self.lead_names = list(lead_names)
+        self.n_samples = 0
+        self._signal = _Ring((len(self.lead_names), int(round(capacity * fs))), dtype)
+        if annotation_capacity is None:
+            annotation_capacity = max(int(np.ceil(capacity * 5)), 1)  # up to 300 bpm
+        self._annotation_index = _Ring((annotation_capacity,), np.int64)
+        self._annotation_label = _Ring((annotation_capacity,), label_dtype)
+
+    def __repr__(self):
+        return f"LiveECGRecord {self.record_name}: {self.lead_names}, {self.n_samples} samples"
+
+    def __len__(self):
+        return self._signal.count
+
+    @property
+    def capacity(self):
+        return self._signal.capacity
+
+    @property
+    def n_sig(self):
+        return len(self.lead_names)
+
+    @property
+    def start_sample(self):
+        return self.n_samples - len(self)
+
+    def append(self, block):
+        block = np.asarray(block)
+        if block.ndim != 2 or block.shape[0] != self.n_sig:
+            raise ValueError(f"block should have shape ({self.n_sig}, n) got {block.shape}")
+        self._signal.write(block)
+        self.n_samples += block.shape[1]
+
+    def add_annotations(self, indices, labels):
+        indices, labels = np.atleast_1d(indices), np.atleast_1d(labels)
+        if indices.shape != labels.shape:
+            raise ValueError(f"len(indices) = {len(indices)} != len(labels) = {len(labels)}")
+        self._annotation_index.write(indices)
+        self._annotation_label.write(labels)
+
+    def add_annotation(self, index, label):
+        self.add_annotations([index], [label])
+
+    def _samples(self, seconds):
+        return len(self) if seconds is None else min(int(round(seconds * self.fs)), len(self))
+
+    def latest(self, seconds=None, out=None):
+        # a view into the ring while the window does not wrap around, otherwise one copy (into ``out`` if given)
+        return self._signal.latest(self._samples(seconds), out=out)
+
+    def latest_annotations(self, seconds=None):
+        first_sample = self.n_samples - self._samples(seconds)
+        indices = self._annotation_index.latest(self._annotation_index.count)
+        labels = self._annotation_label.latest(self._annotation_label.count)
+        keep = (indices >= first_sample) & (indices < self.n_samples)
+        return indices[keep], labels[keep]
+
+    def to_record(self, seconds=None):
+        n = self._samples(seconds)
+        signal = self.latest(seconds)
+        first_sample = self.n_samples - n
+        time = Time(time_stamps=(first_sample + np.arange(n)) / self.fs)
+        time.fs, time.samples = self.fs, n
+        record = ECGRecord(self.record_name, time)
+        for row, lead_name in zip(signal, self.lead_names):
+            record.add_signal(Signal.from_array(row, lead_name))
+        indices, labels = self.latest_annotations(seconds)
+        record.annotations = ECGAnnotation.from_arrays(indices - first_sample, labels)
+        return record
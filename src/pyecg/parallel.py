@@ -0,0 +1,96 @@
+import contextlib
+import copy
+import time
+from collections import namedtuple
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+TaskTiming = namedtuple("TaskTiming", ["name", "start", "stop", "seconds"])
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+class SerialExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def get_executor(executor="serial", max_workers=None):
+    if isinstance(executor, Executor):
+        # caller keeps ownership of executors it passes in, so do not shut them down on exit
+        return contextlib.nullcontext(executor)
+    if executor == "serial":
+        return SerialExecutor()
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor should be one of {['serial'] + list(EXECUTORS)} or an Executor: {executor}")
+    return EXECUTORS[executor](max_workers=max_workers)
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _timed_record(func, record):
+    from pyecg.shared import SharedRecord, SharedRecordHandle
+    if isinstance(record, SharedRecordHandle):
+        with SharedRecord.attach(record) as shared:
+            return _timed(func, shared.record)
+    return _timed(func, record)
+
+
+def map_leads(record, func, executor="serial", max_workers=None, chunk_size=None, in_place=False):
+    from pyecg.ecg import DerivedSignal, Signal
+    n = len(record)
+    if chunk_size is None or chunk_size <= 0:
+        chunk_size = max(n, 1)
+    if in_place:
+        for s in record._signals:
+            if isinstance(s, DerivedSignal) or not isinstance(s.seq_data, (np.ndarray, list)):
+                raise ValueError(f"Lead {s.lead_name} has no writable buffer, in_place needs list or ndarray leads")
+
+    tasks = []
+    with get_executor(executor, max_workers) as pool:
+        for i, signal in enumerate(record._signals):
+            data = np.asarray(signal, dtype=float)
+            for start in range(0, n, chunk_size):
+                stop = min(start + chunk_size, n)
+                tasks.append((i, start, stop, pool.submit(_timed, func, data[start:stop])))
+        results = [(i, start, stop) + tuple(task.result()) for i, start, stop, task in tasks]
+
+    output = None if in_place else np.empty((record.n_sig, n))
+    timings = []
+    for i, start, stop, result, seconds in results:
+        result = np.asarray(result)
+        if result.shape != (stop - start,):
+            raise ValueError(f"func should return {stop - start} samples for lead {record.lead_names[i]}, "
+                             f"got shape {result.shape}")
+        if in_place:
+            seq_data = record._signals[i].seq_data
+            seq_data[start:stop] = result if isinstance(seq_data, np.ndarray) else result.tolist()
+        else:
+            output[i, start:stop] = result
+        timings.append(TaskTiming(record._signals[i].lead_name, start, stop, seconds))
+
+    if in_place:
+        return record, timings
+    new_record = copy.copy(record)
+    new_record._signals = [Signal.from_array(row, s.lead_name) for row, s in zip(output, record._signals)]
+    return new_record, timings
+
+
+def map_records(records, func, executor="serial", max_workers=None):
+    with get_executor(executor, max_workers) as pool:
+        tasks = [pool.submit(_timed_record, func, record) for record in records]
+        results = [task.result() for task in tasks]
+    timings = []
+    for record, (_, seconds) in zip(records, results):
+        timings.append(TaskTiming(getattr(record, "record_name", None), None, None, seconds))
+    return [result for result, _ in results], timings
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+
+import numpy as np
+
+from pyecg.parallel import get_executor, _timed
+from pyecg.segmented import SegmentedArray
+
+LOADERS = {".hea": "from_wfdb", ".ecg": "from_ishine", ".edf": "from_edf", ".xml": "from_aecg"}
+
+
+def load_record(source, window=None):
+    from pyecg import ECGRecord
+    extension = os.path.splitext(source)[1].lower()
+    if extension not in LOADERS:
+        raise ValueError(f"Unknown record format {extension}, expected one of {list(LOADERS)}: {source}")
+    if extension == ".edf" and window is not None:
+        # EDF is memory-mapped, so only the window is ever read
+        return ECGRecord.from_edf(source, start=window[0], stop=window[1])
+    record = getattr(ECGRecord, LOADERS[extension])(source)
+    return record if window is None else record.between(*window)
+
+
+def _nbytes(data):
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, SegmentedArray):
+        return sum(_nbytes(segment) for segment in data.segments)
+    # list-backed leads hold a pointer per element plus a boxed Python number, sized from the first one
+    return sys.getsizeof(data) + (len(data) * sys.getsizeof(data[0]) if len(data) else 0)
+
+
+def record_nbytes(record):
+    return sum(_nbytes(data) for data in [record.time.seq_data] + [s.seq_data for s in record._signals])
+
+
+def _load(loader, source, window):
+    record, seconds = _timed(loader, source, window)
+    return record, seconds, record_nbytes(record)
+
+
+class PrefetchStats:
+    def __init__(self):
+        self.loaded = 0
+        self.load_seconds = 0.0
+        self.stalls = 0  # times the consumer found nothing ready and had to wait
+        self.stall_seconds = 0.0
+        self.max_depth = 0  # records loaded but not yet consumed
+        self.peak_bytes = 0
+        self._depth_sum = 0
+
+    def __repr__(self):
+        return (f"PrefetchStats {self.loaded} loaded in {self.load_seconds:.3f} s, {self.stalls} stalls "
+                f"({self.stall_seconds:.3f} s), queue depth mean {self.mean_depth:.2f} max {self.max_depth}")
+
+    @property
+    def mean_depth(self):
+        return self._depth_sum / self.loaded if self.loaded else 0.0
+
+
+class PrefetchLoader:
+    def __init__(self, sources, windows=None, loader=load_record, executor="thread", max_workers=2, prefetch=4,
+                 max_bytes=None, ordered=True):
+        self.sources = list(sources)
+        self.windows = [None] * len(self.sources) if windows is None else list(windows)
+        if len(self.windows) != len(self.sources):
+            raise ValueError(f"len(windows) = {len(self.windows)} != len(sources) = {len(self.sources)}")
+        if prefetch < 1:
+            raise ValueError(f"prefetch should be at least 1: {prefetch}")
+        self.loader = loader
+        self.executor = executor
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        self.max_bytes = max_bytes
+        self.ordered = ordered
+        self.stats = PrefetchStats()
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self):
+        for _, record in self.items():
+            yield record
+
+    def items(self):
+        self.stats = stats = PrefetchStats()
+        largest = 0
+
+        def ready_sizes():
+            return [f.result()[2] for _, f in pending if f.done() and f.exception() is None]
+
+        def within_cap():
+            # loads still running are assumed to be as large as the largest record seen so far
+            if self.max_bytes is None or not pending:
+                return True
+            sizes = ready_sizes()
+            size = max([largest] + sizes)
+            if size == 0:
+                return False
+            running = sum(not f.done() for _, f in pending)
+            return sum(sizes) + (running + 1) * size <= self.max_bytes
+
+        pending = deque()
+        with get_executor(self.executor, self.max_workers) as pool:
+            try:
+                position = 0
+                while position < len(self.sources) or pending:
+                    # the memory cap only holds back new work, one load is always allowed so progress never stops
+                    while position < len(self.sources) and len(pending) < self.prefetch and within_cap():
+                        future = pool.submit(_load, self.loader, self.sources[position], self.windows[position])
+                        pending.append((position, future))
+                        position += 1
+
+                    index, future = self._next(pending, stats)
+                    record, seconds, nbytes = future.result()
+                    largest = max(largest, nbytes)
+                    depth = sum(f.done() for _, f in pending) + 1
+                    stats.peak_bytes = max(stats.peak_bytes, sum(ready_sizes()) + nbytes)
+                    stats.loaded += 1
+                    stats.load_seconds += seconds
+                    stats.max_depth = max(stats.max_depth, depth)
+                    stats._depth_sum += depth
+                    yield index, record
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _next(self, pending, stats):
+        if self.ordered:
+            chosen = 0
+            if not pending[0][1].done():
+                started = time.perf_counter()
+                wait([pending[0][1]])
+                stats.stalls += 1
+                stats.stall_seconds += time.perf_counter() - started
+        else:
+            done = [k for k, (_, future) in enumerate(pending) if future.done()]
+            if not done:
+                started = time.perf_counter()
+                wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                stats.stalls += 1
+                stats.stall_seconds += time.perf_counter() - started
+                done = [k for k, (_, future) in enumerate(pending) if future.done()]
+            chosen = done[0]
+        item = pending[chosen]
+        del pending[chosen]
+        return item
@@ -0,0 +1,137 @@
+import numpy as np
+
+MAX_LEVELS = 32
+
+
+class MinMaxPyramid:
+    fs = None
+    start = None
+    lead_names = None
+    source = None
+
+    def __init__(self, fs, lead_names, start=0.0, max_levels=MAX_LEVELS):
+        self.fs = fs
+        self.start = start
+        self.lead_names = list(lead_names)
+        self.max_levels = max_levels
+        self.n_samples = 0
+        n_sig = len(self.lead_names)
+        # level k holds complete min/max bins of 2 ** (k + 1) samples in a buffer that doubles when full, so that
+        # extending appends in place, tails hold the not yet paired input
+        self._buffers = [(np.empty((n_sig, 0)), np.empty((n_sig, 0))) for _ in range(max_levels)]
+        self._sizes = [0] * max_levels
+        self._tails = [(np.empty((n_sig, 0)), np.empty((n_sig, 0))) for _ in range(max_levels)]
+
+    def __repr__(self):
+        return f"MinMaxPyramid {self.n_samples} samples, {self.n_levels} levels: {self.lead_names}"
+
+    @property
+    def n_levels(self):
+        return int(np.sum([size > 0 or tail[0].shape[1] > 0 for size, tail in zip(self._sizes, self._tails)]))
+
+    @property
+    def factors(self):
+        return [2 ** (k + 1) for k in range(self.n_levels)]
+
+    @classmethod
+    def from_record(cls, record, max_levels=MAX_LEVELS):
+        pyramid = cls(record.fs, record.lead_names, start=float(record.time[0]) if len(record) else 0.0,
+                      max_levels=max_levels)
+        pyramid.extend(record.p_signal)
+        pyramid.source = record
+        return pyramid
+
+    def _append(self, k, lo, hi):
+        buffer_lo, buffer_hi = self._buffers[k]
+        size, n = self._sizes[k], lo.shape[1]
+        if size + n > buffer_lo.shape[1]:
+            capacity = max(2 * buffer_lo.shape[1], size + n, 16)
+            grown_lo, grown_hi = np.empty((lo.shape[0], capacity)), np.empty((lo.shape[0], capacity))
+            grown_lo[:, :size], grown_hi[:, :size] = buffer_lo[:, :size], buffer_hi[:, :size]
+            self._buffers[k] = buffer_lo, buffer_hi = grown_lo, grown_hi
+        buffer_lo[:, size:size + n], buffer_hi[:, size:size + n] = lo, hi
+        self._sizes[k] = size + n
+
+    def extend(self, block):
+        block = np.asarray(block, dtype=float)
+        if block.ndim != 2 or block.shape[0] != len(self.lead_names):
+            raise ValueError(f"block should have shape ({len(self.lead_names)}, n) got {block.shape}")
+        self.n_samples += block.shape[1]
+        lo = hi = block
+        for k in range(self.max_levels):
+            tail_lo, tail_hi = self._tails[k]
+            lo = np.concatenate([tail_lo, lo], axis=1)
+            hi = np.concatenate([tail_hi, hi], axis=1)
+            even = lo.shape[1] // 2 * 2
+            self._tails[k] = lo[:, even:], hi[:, even:]
+            if even == 0:
+                break
+            lo = np.minimum(lo[:, 0:even:2], lo[:, 1:even:2])
+            hi = np.maximum(hi[:, 0:even:2], hi[:, 1:even:2])
+            self._append(k, lo, hi)
+
+    def _partial(self, k):
+        # samples not yet covered by a complete bin of level k form one trailing partial bin
+        partial_lo = partial_hi = None
+        for tail_lo, tail_hi in self._tails[:k + 1]:
+            if tail_lo.shape[1] > 0:
+                partial_lo = tail_lo[:, 0] if partial_lo is None else np.minimum(partial_lo, tail_lo[:, 0])
+                partial_hi = tail_hi[:, 0] if partial_hi is None else np.maximum(partial_hi, tail_hi[:, 0])
+        return partial_lo, partial_hi
+
+    def bins(self, k, first, last):
+        # bins [first, last) of level k, only that range is copied
+        size = self._sizes[k]
+        buffer_lo, buffer_hi = self._buffers[k]
+        first, last = max(first, 0), max(last, 0)
+        lo, hi = buffer_lo[:, min(first, size):min(last, size)], buffer_hi[:, min(first, size):min(last, size)]
+        partial_lo, partial_hi = self._partial(k)
+        if partial_lo is not None and first <= size < last:
+            return (np.concatenate([lo, partial_lo[:, None]], axis=1),
+                    np.concatenate([hi, partial_hi[:, None]], axis=1))
+        return lo.copy(), hi.copy()
+
+    def level(self, k):
+        return self.bins(k, 0, self._sizes[k] + 1)
+
+    def envelope(self, t0, t1, width):
+        start = int(np.clip(np.ceil((t0 - self.start) * self.fs - 1e-9), 0, self.n_samples))
+        stop = int(np.clip(np.ceil((t1 - self.start) * self.fs - 1e-9), start, self.n_samples))
+        return self.envelope_samples(start, stop, width)
+
+    def envelope_samples(self, start, stop, width):
+        if width < 1:
+            raise ValueError(f"width should be positive: {width}")
+        n = stop - start
+        k = int(np.floor(np.log2(n / width))) - 1 if n >= 2 * width else -1
+        k = min(k, self.n_levels - 1)
+        if k < 0 and self.source is not None:
+            raw = self.source[start:stop].p_signal.reshape(len(self.lead_names), n).astype(float)
+            return 1, raw, raw
+        k = max(k, 0)
+        factor = 2 ** (k + 1)
+        lo, hi = self.bins(k, start // factor, -(-stop // factor))
+        return factor, lo, hi
+
+    def save(self, path):
+        arrays = {"fs": self.fs, "start": self.start, "lead_names": np.array(self.lead_names, dtype=str),
+                  "n_samples": self.n_samples}
+        for k in range(self.n_levels):
+            lo, hi = self._buffers[k]
+            arrays[f"min_{k}"], arrays[f"max_{k}"] = lo[:, :self._sizes[k]], hi[:, :self._sizes[k]]
+            arrays[f"tail_min_{k}"], arrays[f"tail_max_{k}"] = self._tails[k]
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, source=None):
+        with np.load(path) as data:
+            pyramid = cls(float(data["fs"]), data["lead_names"].tolist(), start=float(data["start"]))
+            pyramid.n_samples = int(data["n_samples"])
+            k = 0
+            while f"min_{k}" in data:
+                pyramid._buffers[k] = data[f"min_{k}"], data[f"max_{k}"]
+                pyramid._sizes[k] = data[f"min_{k}"].shape[1]
+                pyramid._tails[k] = data[f"tail_min_{k}"], data[f"tail_max_{k}"]
+                k += 1
+        pyramid.source = source
+        return pyramid
@@ -0,0 +1,133 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample, ARTEFACT, ARTEFACT_END
+
+CHECKS = ["flatline", "clipping", "hf_noise", "drift", "lead_off"]
+
+
+def window_view(signal, window, step):
+    signal = np.ascontiguousarray(signal)
+    n_sig, n = signal.shape
+    n_windows = (n - window) // step + 1 if n >= window else 0
+    return as_strided(signal, shape=(n_sig, n_windows, window),
+                      strides=(signal.strides[0], step * signal.strides[1], signal.strides[1]), writeable=False)
+
+
+class QualityReport:
+    starts = None
+    window = None
+    scores = None
+    flags = None
+
+    def __init__(self, starts, window, scores, flags, lead_names):
+        self.starts = starts
+        self.window = window
+        self.scores = scores
+        self.flags = flags
+        self.lead_names = lead_names
+
+    def __repr__(self):
+        return f"QualityReport {len(self)} windows, {int(np.sum(self.quality < 1))} with artefacts"
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def bad(self):
+        # (n_sig, n_windows), True where any check failed on that lead
+        return np.any([self.flags[check] for check in CHECKS], axis=0)
+
+    @property
+    def quality(self):
+        # fraction of leads passing every check, per window
+        if len(self.lead_names) == 0:
+            return np.ones(len(self))
+        return 1 - self.bad.mean(axis=0)
+
+    def good_windows(self, min_quality=1.0):
+        return self.starts[self.quality >= min_quality]
+
+    def runs(self, min_quality=1.0):
+        # (starts, stops) sample ranges of the bad episodes, overlapping or touching bad windows are merged
+        starts = self.starts[self.quality < min_quality]
+        if len(starts) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        stops = starts + self.window
+        new_run = np.concatenate([[True], starts[1:] > np.maximum.accumulate(stops)[:-1]])
+        first = np.flatnonzero(new_run)
+        return starts[first], np.maximum.reduceat(stops, first)
+
+    def sample_mask(self, n_samples, min_quality=1.0):
+        good = np.ones(n_samples, dtype=bool)
+        for start, stop in zip(*self.runs(min_quality)):
+            good[start:stop] = False
+        return good
+
+    def to_annotation(self, min_quality=1.0):
+        # each episode is a pair of markers, ARTEFACT on its first sample and ARTEFACT_END on its last
+        samples = []
+        for start, stop in zip(*self.runs(min_quality)):
+            samples += [ECGAnnotationSample(int(start), ARTEFACT), ECGAnnotationSample(int(stop) - 1, ARTEFACT_END)]
+        return ECGAnnotation(samples)
+
+
+class SignalQuality:
+    def __init__(self, window=2.0, step=1.0, flatline_std=0.005, clipping_fraction=0.1, hf_cutoff=40.0,
+                 hf_noise_ratio=0.3, drift_block=0.25, drift_range=2.0, lead_off_nan_fraction=0.5,
+                 rails=None, batch_size=1024):
+        self.window = window
+        self.step = step
+        self.flatline_std = flatline_std
+        self.clipping_fraction = clipping_fraction
+        self.hf_cutoff = hf_cutoff
+        self.hf_noise_ratio = hf_noise_ratio
+        self.drift_block = drift_block
+        self.drift_range = drift_range
+        self.lead_off_nan_fraction = lead_off_nan_fraction
+        self.rails = rails
+        self.batch_size = batch_size
+
+    def score(self, record):
+        fs = record.fs
+        window, step = int(round(self.window * fs)), max(int(round(self.step * fs)), 1)
+        block = max(int(round(self.drift_block * fs)), 1)
+        n_blocks = window // block
+        signal = record.p_signal.astype(float).reshape(record.n_sig, len(record))
+        missing = np.isnan(signal)
+        signal[missing] = 0.0
+        if self.rails is not None:
+            low, high = (np.broadcast_to(np.asarray(r, dtype=float), (record.n_sig,)) for r in self.rails)
+        elif len(record) > 0:
+            low, high = signal.min(axis=1), signal.max(axis=1)
+        else:
+            low = high = np.zeros(record.n_sig)
+        tolerance = 1e-9 * np.maximum(np.abs(high - low), 1.0)
+        at_rail = (np.abs(signal - low[:, None]) <= tolerance[:, None]) | \
+                  (np.abs(signal - high[:, None]) <= tolerance[:, None])
+        high_band = np.fft.rfftfreq(window, 1 / fs) >= self.hf_cutoff
+
+        windows, rail_windows, missing_windows = (window_view(x, window, step) for x in (signal, at_rail, missing))
+        n_windows = windows.shape[1]
+        scores = {check: np.zeros((record.n_sig, n_windows)) for check in CHECKS}
+        for start in range(0, n_windows, self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            x = windows[:, batch]
+            centered = x - x.mean(axis=2, keepdims=True)
+            power = np.abs(np.fft.rfft(centered, axis=2)) ** 2
+            block_means = x[:, :, :n_blocks * block].reshape(x.shape[0], x.shape[1], n_blocks, block).mean(axis=3)
+
+            scores["flatline"][:, batch] = centered.std(axis=2)
+            scores["clipping"][:, batch] = rail_windows[:, batch].mean(axis=2)
+            scores["hf_noise"][:, batch] = power[:, :, high_band].sum(axis=2) / np.maximum(power.sum(axis=2), 1e-12)
+            scores["drift"][:, batch] = block_means.max(axis=2) - block_means.min(axis=2)
+            scores["lead_off"][:, batch] = missing_windows[:, batch].mean(axis=2)
+
+        flags = {"flatline": scores["flatline"] < self.flatline_std,
+                 "clipping": scores["clipping"] >= self.clipping_fraction,
+                 "hf_noise": scores["hf_noise"] >= self.hf_noise_ratio,
+                 "drift": scores["drift"] >= self.drift_range}
+        flags["lead_off"] = (scores["lead_off"] >= self.lead_off_nan_fraction) | \
+                            (flags["flatline"] & (scores["clipping"] >= 1.0))
+        starts = np.arange(n_windows, dtype=np.int64) * step
+        return QualityReport(starts, window, scores, flags, record.lead_names)
@@ -0,0 +1,102 @@
+import numpy as np
+
+from pyecg.annotations import BEAT_LABELS
+
+MODES = ["sequential", "shuffle", "stratified", "weighted"]
+
+
+class WindowSampler:
+    records = None
+    classes = None
+
+    def __init__(self, records, window=(0.5, 0.5), labels=None, seed=0, index=None):
+        self.records = list(records)
+        self.window = window
+        self.seed = seed
+        self._bounds = []
+        for record in self.records:
+            fs = record.fs
+            self._bounds.append((int(round(window[0] * fs)), int(round(window[1] * fs))))
+        if index is None:
+            index = self._build_index(labels)
+        self.record_index, self.sample, self.label_code, self.classes = index
+        # positions grouped by class, so per-class draws never rescan the index
+        self._by_class = np.argsort(self.label_code, kind="stable")
+        self._class_start = np.searchsorted(self.label_code[self._by_class], np.arange(len(self.classes) + 1))
+
+    def __repr__(self):
+        return f"WindowSampler {len(self)} windows over {len(self.records)} records: {self.class_counts}"
+
+    def __len__(self):
+        return len(self.sample)
+
+    def _build_index(self, labels):
+        record_index, samples, label_values = [], [], []
+        for k, record in enumerate(self.records):
+            if record.annotations is None:
+                continue
+            indices, record_labels = record.annotations.indices, record.annotations.labels
+            keep = np.isin(record_labels, BEAT_LABELS) if labels is None else np.isin(record_labels, labels)
+            pre, post = self._bounds[k]
+            keep &= (indices - pre >= 0) & (indices + post <= len(record))
+            record_index.append(np.full(int(keep.sum()), k, dtype=np.int32))
+            samples.append(indices[keep])
+            label_values.append(record_labels[keep])
+        if not samples:
+            return np.empty(0, np.int32), np.empty(0, np.int64), np.empty(0, np.int16), []
+        label_values = np.concatenate(label_values)
+        classes, label_code = np.unique(label_values, return_inverse=True)
+        return np.concatenate(record_index), np.concatenate(samples), label_code.astype(np.int16), classes.tolist()
+
+    @property
+    def class_counts(self):
+        return dict(zip(self.classes, np.diff(self._class_start).tolist()))
+
+    def epoch(self, epoch=0, mode="shuffle", n_samples=None, weights=None, rank=0, world_size=1):
+        if mode not in MODES:
+            raise ValueError(f"mode should be one of {MODES}: {mode}")
+        if not 0 <= rank < world_size:
+            raise ValueError(f"rank should be in [0, {world_size}): {rank}")
+        rng = np.random.RandomState([self.seed, epoch])
+        n_samples = len(self) if n_samples is None else n_samples
+        counts = np.diff(self._class_start)
+        if mode == "sequential":
+            order = np.arange(len(self))
+        elif mode == "shuffle":
+            order = rng.permutation(len(self))
+        elif mode == "stratified":
+            present = np.flatnonzero(counts)
+            per_class = np.full(len(present), n_samples // max(len(present), 1))
+            per_class[:n_samples - per_class.sum()] += 1
+            draws = [self._class_start[c] + rng.randint(0, counts[c], size=n) for c, n in zip(present, per_class)]
+            order = self._by_class[np.concatenate(draws)] if draws else np.empty(0, dtype=np.int64)
+            order = order[rng.permutation(len(order))]
+        else:
+            class_weights = np.ones(len(self.classes)) if weights is None else \
+                np.array([weights.get(c, 0.0) for c in self.classes], dtype=float)
+            p = (class_weights / np.maximum(counts, 1))[self.label_code]
+            order = rng.choice(len(self), size=n_samples, p=p / p.sum())
+        # every shard gets the same number of windows so that workers stay in lockstep
+        order = order[:len(order) // world_size * world_size]
+        return order[rank::world_size]
+
+    def get_window(self, position):
+        k = int(self.record_index[position])
+        pre, post = self._bounds[k]
+        sample = int(self.sample[position])
+        return self.records[k].window(sample - pre, sample + post), self.classes[self.label_code[position]]
+
+    def windows(self, epoch=0, **kwargs):
+        for position in self.epoch(epoch, **kwargs):
+            yield self.get_window(position)
+
+    def save(self, path):
+        np.savez(path, record_index=self.record_index, sample=self.sample, label_code=self.label_code,
+                 classes=np.array(self.classes, dtype=str), window=np.asarray(self.window, dtype=float))
+
+    @classmethod
+    def load(cls, path, records, seed=0):
+        with np.load(path) as data:
+            index = data["record_index"], data["sample"], data["label_code"], data["classes"].tolist()
+            window = tuple(data["window"].tolist())
+        return cls(records, window=window, seed=seed, index=index)
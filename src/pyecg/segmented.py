@@ -0,0 +1,66 @@
+import itertools
+import numbers
+
+import numpy as np
+
+
+class SegmentedArray:
+    segments = None
+    offsets = None
+
+    def __init__(self, segments):
+        self.segments = []
+        for segment in segments:
+            if isinstance(segment, SegmentedArray):
+                self.segments.extend(segment.segments)
+            elif len(segment) > 0:
+                self.segments.append(segment)
+        lengths = [len(s) for s in self.segments]
+        self.offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+
+    def __repr__(self):
+        return f"SegmentedArray of {len(self.segments)} segments, {len(self)} samples"
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.segments)
+
+    def __array__(self, dtype=None, copy=None):
+        if not self.segments:
+            return np.empty(0, dtype=dtype if dtype is not None else float)
+        return np.concatenate([np.asarray(s, dtype=dtype) for s in self.segments])
+
+    def __eq__(self, other):
+        other = np.asarray(other)
+        return other.shape == (len(self),) and np.array_equal(np.asarray(self), other)
+
+    def tolist(self):
+        return list(self)
+
+    def segment_of(self, index):
+        return np.searchsorted(self.offsets, index, side="right") - 1
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            if item < 0:
+                item += len(self)
+            if not 0 <= item < len(self):
+                raise IndexError(f"index {item} out of range for {len(self)} samples")
+            k = int(self.segment_of(item))
+            return self.segments[k][item - int(self.offsets[k])]
+        if not isinstance(item, slice):
+            return np.asarray(self)[item]
+        start, stop, step = item.indices(len(self))
+        if step != 1:
+            return np.asarray(self)[item]
+        if stop <= start:
+            return SegmentedArray([])
+        pieces = []
+        for k in range(int(self.segment_of(start)), int(self.segment_of(stop - 1)) + 1):
+            offset = int(self.offsets[k])
+            segment = self.segments[k]
+            a, b = max(start - offset, 0), min(stop - offset, len(segment))
+            pieces.append(segment if (a, b) == (0, len(segment)) else segment[a:b])
+        return SegmentedArray(pieces)
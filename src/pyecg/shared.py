@@ -0,0 +1,161 @@
+import copy
+import mmap
+import os
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pyecg.annotations import ECGAnnotation
+from pyecg.ecg import ECGRecord, Signal, Time
+
+ALIGNMENT = 64
+
+
+class SharedRecordHandle:
+    """Small picklable description of a record exported by SharedRecord, sent to workers instead of the data."""
+
+    def __init__(self, record_name, lead_names, fs, n_samples, n_annotations, label_dtype, shm_name=None,
+                 path=None):
+        self.record_name = record_name
+        self.lead_names = list(lead_names)
+        self.fs = fs
+        self.n_samples = n_samples
+        self.n_annotations = n_annotations
+        self.label_dtype = label_dtype
+        self.shm_name = shm_name
+        self.path = path
+
+    def __repr__(self):
+        return f"SharedRecordHandle {self.record_name}: {self.shm_name or self.path}"
+
+    @property
+    def layout(self):
+        fields = [("time", np.dtype(np.float64), (self.n_samples,)),
+                  ("signals", np.dtype(np.float64), (len(self.lead_names), self.n_samples)),
+                  ("annotation_indices", np.dtype(np.int64), (self.n_annotations,)),
+                  ("annotation_labels", np.dtype(self.label_dtype), (self.n_annotations,))]
+        layout, offset = {}, 0
+        for name, dtype, shape in fields:
+            layout[name] = (offset, dtype, shape)
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            offset += -(-nbytes // ALIGNMENT) * ALIGNMENT
+        return layout, max(offset, 1)
+
+
+class SharedRecord:
+    """Owns (or attaches to) one shared memory block or mapped file holding a record and its annotations.
+
+    The exporting process owns the block and must ``unlink`` it once all workers are done; every process
+    must ``close`` its mapping after dropping the records it got from it.
+    """
+
+    handle = None
+    owner = False
+
+    def __init__(self, handle, buffer, owner=False, shm=None, mapped_file=None):
+        self.handle = handle
+        self.owner = owner
+        self._buffer = buffer
+        self._shm = shm
+        self._mapped_file = mapped_file
+        self._record = None
+        layout, _ = handle.layout
+        self.arrays = {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+                       for name, (offset, dtype, shape) in layout.items()}
+
+    def __repr__(self):
+        return f"SharedRecord {self.handle}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    @classmethod
+    def export(cls, record, path=None):
+        annotations = record.annotations if record.annotations is not None else ECGAnnotation([])
+        labels = annotations.labels
+        handle = SharedRecordHandle(record.record_name, record.lead_names, record.time.fs, len(record),
+                                    len(annotations), labels.dtype.str)
+        _, nbytes = handle.layout
+        if path is None:
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            handle.shm_name = shm.name
+            shared = cls(handle, shm.buf, owner=True, shm=shm)
+        else:
+            with open(path, "wb") as f:
+                f.truncate(nbytes)
+            handle.path = os.path.abspath(path)
+            shared = cls._map_file(handle, owner=True)
+        shared.arrays["time"][:] = np.asarray(record.time, dtype=np.float64)
+        if record.n_sig > 0:
+            shared.arrays["signals"][:] = record.p_signal
+        shared.arrays["annotation_indices"][:] = annotations.indices
+        shared.arrays["annotation_labels"][:] = labels
+        return shared
+
+    @classmethod
+    def attach(cls, handle):
+        if handle.shm_name is not None:
+            shm = shared_memory.SharedMemory(name=handle.shm_name)
+            return cls(handle, shm.buf, shm=shm)
+        return cls._map_file(handle)
+
+    @classmethod
+    def _map_file(cls, handle, owner=False):
+        with open(handle.path, "r+b") as f:
+            mapped_file = mmap.mmap(f.fileno(), 0)
+        return cls(handle, mapped_file, owner=owner, mapped_file=mapped_file)
+
+    @property
+    def record(self):
+        if self.arrays is None:
+            raise ValueError(f"{self} is closed")
+        if self._record is None:
+            time = Time(time_stamps=self.arrays["time"])
+            if self.handle.fs is not None:
+                time.fs = self.handle.fs
+                time.samples = self.handle.n_samples
+            record = ECGRecord(self.handle.record_name, time)
+            for signal, lead_name in zip(self.arrays["signals"], self.handle.lead_names):
+                record.add_signal(Signal.from_array(signal, lead_name))
+            record.annotations = ECGAnnotation.from_arrays(self.arrays["annotation_indices"],
+                                                           self.arrays["annotation_labels"])
+            self._record = record
+        return self._record
+
+    def close(self):
+        # views handed out through ``record`` must be dropped before this, otherwise the buffer cannot be released
+        self._record = None
+        self.arrays = None
+        self._buffer = None
+        if self._shm is not None:
+            self._shm.close()
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+
+    def unlink(self):
+        if not self.owner:
+            raise ValueError("Only the exporting process can unlink a shared record")
+        if self._shm is not None:
+            self._shm.unlink()
+        elif os.path.exists(self.handle.path):
+            os.remove(self.handle.path)
+
+
+def dumps(record):
+    """Pickle a record with protocol 5, returning its lead buffers out-of-band instead of copying them."""
+    transport = copy.copy(record)
+    transport._signals = [Signal.from_array(np.ascontiguousarray(s, dtype=np.float64), s.lead_name)
+                          for s in record._signals]
+    buffers = []
+    payload = pickle.dumps(transport, protocol=5, buffer_callback=buffers.append)
+    return payload, buffers
+
+
+def loads(payload, buffers):
+    return pickle.loads(payload, buffers=buffers)
@@ -0,0 +1,137 @@
+import numpy as np
+
+from pyecg.annotations import BEAT_LABELS, GAP_LABELS, NORMAL_BEAT
+from pyecg.quality import window_view
+
+HRV_BANDS = {"vlf": (0.0033, 0.04), "lf": (0.04, 0.15), "hf": (0.15, 0.4)}
+HRV_METHODS = ["resample", "lomb"]
+LOMB_BLOCK = 1 << 20  # elements per (frequencies x times) temporary in lomb_scargle, 8 MB of float64
+
+
+def _segments(signal, nperseg, noverlap):
+    step = nperseg - noverlap
+    if not 0 < step <= nperseg:
+        raise ValueError(f"noverlap should be in [0, nperseg): {noverlap}")
+    segments = window_view(signal, nperseg, step)  # (n_sig, n_segments, nperseg)
+    return segments - segments.mean(axis=2, keepdims=True)
+
+
+def _taper(nperseg, fs):
+    taper = np.hanning(nperseg + 1)[:-1]  # periodic Hann
+    return taper, 1.0 / (fs * (taper ** 2).sum())
+
+
+def stft(signal, fs, nperseg=256, noverlap=None):
+    signal = np.atleast_2d(np.asarray(signal, dtype=float))
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    taper, _ = _taper(nperseg, fs)
+    spectra = np.fft.rfft(_segments(signal, nperseg, noverlap) * taper, axis=2)
+    frequencies = np.fft.rfftfreq(nperseg, 1 / fs)
+    times = (np.arange(spectra.shape[1]) * (nperseg - noverlap) + nperseg / 2) / fs
+    return frequencies, times, spectra.transpose(0, 2, 1)  # (n_sig, n_frequencies, n_segments)
+
+
+def welch(signal, fs, nperseg=256, noverlap=None):
+    accumulator = WelchAccumulator(fs, nperseg=nperseg, noverlap=noverlap)
+    accumulator.update(signal)
+    return accumulator.frequencies, accumulator.psd
+
+
+class WelchAccumulator:
+    # running Welch average, fed block by block so that multi-day records never have to be in memory at once
+
+    def __init__(self, fs, nperseg=256, noverlap=None, batch_size=4096):
+        self.fs = fs
+        self.nperseg = nperseg
+        self.noverlap = nperseg // 2 if noverlap is None else noverlap
+        self.batch_size = batch_size
+        self.frequencies = np.fft.rfftfreq(nperseg, 1 / fs)
+        self.n_segments = 0
+        self._taper, self._scale = _taper(nperseg, fs)
+        self._sum = None
+        self._tail = None
+
+    def update(self, block):
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if self._tail is None:
+            self._tail = np.empty((block.shape[0], 0))
+            self._sum = np.zeros((block.shape[0], len(self.frequencies)))
+        signal = np.concatenate([self._tail, block], axis=1)
+        step = self.nperseg - self.noverlap
+        n_segments = (signal.shape[1] - self.nperseg) // step + 1 if signal.shape[1] >= self.nperseg else 0
+        span = self.batch_size * step
+        for start in range(0, n_segments * step, span):
+            segments = _segments(signal[:, start:start + span + self.noverlap], self.nperseg, self.noverlap)
+            power = np.abs(np.fft.rfft(segments * self._taper, axis=2)) ** 2
+            self._sum += power.sum(axis=1)
+        self.n_segments += n_segments
+        self._tail = signal[:, n_segments * step:]
+        return self
+
+    @property
+    def psd(self):
+        if not self.n_segments:
+            raise ValueError(f"At least {self.nperseg} samples are needed for a PSD estimate")
+        psd = self._sum * self._scale / self.n_segments
+        # one-sided spectrum: every bin but DC (and Nyquist for even nperseg) carries the mirrored power
+        psd[:, 1:len(self.frequencies) - (self.nperseg % 2 == 0)] *= 2
+        return psd
+
+
+def record_psd(record, nperseg=256, noverlap=None, chunk_size=1 << 18):
+    accumulator = WelchAccumulator(record.fs, nperseg=nperseg, noverlap=noverlap)
+    for start in range(0, len(record), chunk_size):
+        stop = min(start + chunk_size, len(record))
+        accumulator.update([np.asarray(s[start:stop], dtype=float) for s in record._signals])
+    return accumulator.frequencies, accumulator.psd
+
+
+def rr_intervals(annotations, fs, labels=None):
+    # NN intervals by default: an interval counts only if both of its beats are in ``labels`` and nothing but
+    # those two beats separates them, so intervals next to ectopic beats or across gaps are left out
+    labels = [NORMAL_BEAT] if labels is None else labels
+    indices, event_labels = annotations.indices, annotations.labels
+    events = np.isin(event_labels, BEAT_LABELS) | np.isin(event_labels, GAP_LABELS) | np.isin(event_labels, labels)
+    times, selected = indices[events] / fs, np.isin(event_labels[events], labels)
+    valid = selected[1:] & selected[:-1]
+    return times[1:][valid], np.diff(times)[valid]
+
+
+def lomb_scargle(times, values, frequencies, batch_size=None):
+    times, values = np.asarray(times, dtype=float), np.asarray(values, dtype=float)
+    values = values - values.mean()
+    # the frequency batch shrinks with the series, so each temporary stays near LOMB_BLOCK elements
+    batch_size = max(1, LOMB_BLOCK // max(len(times), 1)) if batch_size is None else batch_size
+    power = np.empty(len(frequencies))
+    for start in range(0, len(frequencies), batch_size):
+        omega = 2 * np.pi * np.asarray(frequencies[start:start + batch_size], dtype=float)[:, None]
+        tau = np.arctan2(np.sin(2 * omega * times).sum(axis=1), np.cos(2 * omega * times).sum(axis=1)) / 2
+        phase = omega * times - tau[:, None]
+        cos, sin = np.cos(phase), np.sin(phase)
+        power[start:start + batch_size] = (cos @ values) ** 2 / (cos ** 2).sum(axis=1) + \
+            (sin @ values) ** 2 / (sin ** 2).sum(axis=1)
+    # scaled to a one-sided density at the mean sampling rate, so that band integrals compare with welch
+    return power * (times[-1] - times[0]) / len(times)
+
+
+def hrv_frequency(annotations, fs, method="resample", resample_fs=4.0, nperseg=256, labels=None):
+    if method not in HRV_METHODS:
+        raise ValueError(f"method should be one of {HRV_METHODS}: {method}")
+    times, rr = rr_intervals(annotations, fs, labels=labels)
+    if len(rr) < 3:
+        raise ValueError(f"Not enough beats for HRV: {len(rr) + 1}")
+    if method == "resample":
+        grid = np.arange(times[0], times[-1], 1 / resample_fs)
+        tachogram = np.interp(grid, times, rr)
+        frequencies, psd = welch(tachogram, resample_fs, nperseg=min(nperseg, len(grid)))
+        psd = psd[0]
+    else:
+        frequencies = np.linspace(HRV_BANDS["vlf"][0], HRV_BANDS["hf"][1], 512)
+        psd = lomb_scargle(times, rr, frequencies)
+    resolution = frequencies[1] - frequencies[0]
+    result = {}
+    for band, (lo, hi) in HRV_BANDS.items():
+        result[band] = float(psd[(frequencies >= lo) & (frequencies < hi)].sum() * resolution)
+    result["lf_hf"] = result["lf"] / result["hf"] if result["hf"] > 0 else np.nan
+    result["lf_nu"] = result["lf"] / (result["lf"] + result["hf"]) if result["lf"] + result["hf"] > 0 else np.nan
+    return result
@@ -0,0 +1,155 @@
+import numpy as np
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation, NORMAL_BEAT, PVC, ARTEFACT
+
+# (centre in s relative to the R peak, width in s, amplitude in mV) of the P, Q, R, S and T waves in lead II
+WAVES = {NORMAL_BEAT: np.array([(-0.2, 0.025, 0.15), (-0.03, 0.01, -0.1), (0.0, 0.01, 1.0),
+                                (0.03, 0.01, -0.25), (0.25, 0.05, 0.3)]),
+         PVC: np.array([(-0.2, 0.025, 0.0), (-0.04, 0.02, -0.1), (0.0, 0.035, 1.2),
+                        (0.07, 0.03, -0.4), (0.3, 0.07, -0.4)])}
+BEAT_SPAN = (-0.35, 0.6)
+# per-wave gains of each lead relative to lead II, limb leads follow Einthoven / Goldberger from I and II
+_I, _II = np.array([0.6, 0.5, 0.6, 0.4, 0.5]), np.ones(5)
+LEAD_GAINS = {"I": _I, "II": _II, "MLII": _II, "III": _II - _I,
+              "aVR": -(_I + _II) / 2, "aVL": _I - _II / 2, "aVF": _II - _I / 2,
+              "V1": np.array([0.5, 0.0, 0.3, 2.0, -0.2]), "V2": np.array([0.6, 0.1, 0.6, 2.4, 0.8]),
+              "V3": np.array([0.6, 0.3, 1.0, 1.6, 1.0]), "V4": np.array([0.6, 0.5, 1.4, 1.0, 1.0]),
+              "V5": np.array([0.6, 0.6, 1.3, 0.6, 0.9]), "V6": np.array([0.6, 0.6, 1.0, 0.4, 0.7])}
+NOISE_BLOCK = 1 << 16
+BEAT_BLOCK = 4096
+
+
+class SyntheticECG:
+    def __init__(self, fs=250, lead_names=("MLII", "V5"), heart_rate=70.0, lf_amplitude=0.03, hf_amplitude=0.02,
+                 rr_jitter=0.01, ectopic_rate=0.02, noise_std=0.01, wander_amplitude=0.05, artefact_rate=2.0,
+                 artefact_duration=(0.5, 3.0), artefact_std=0.5, seed=0):
+        unknown = [lead_name for lead_name in lead_names if lead_name not in LEAD_GAINS]
+        if unknown:
+            raise ValueError(f"Leads {unknown} are not in {sorted(LEAD_GAINS)}")
+        self.fs = fs
+        self.lead_names = list(lead_names)
+        self.heart_rate = heart_rate
+        self.lf_amplitude = lf_amplitude  # relative RR modulation at 0.1 Hz (Mayer waves)
+        self.hf_amplitude = hf_amplitude  # relative RR modulation at 0.25 Hz (respiration)
+        self.rr_jitter = rr_jitter
+        self.ectopic_rate = ectopic_rate  # fraction of beats replaced by premature ventricular beats
+        self.noise_std = noise_std
+        self.wander_amplitude = wander_amplitude
+        self.artefact_rate = artefact_rate  # artefact bursts per hour
+        self.artefact_duration = artefact_duration
+        self.artefact_std = artefact_std
+        self.seed = seed
+        self._templates = {label: self._template(waves) for label, waves in WAVES.items()}
+
+    def __repr__(self):
+        return f"SyntheticECG {self.fs} Hz {self.lead_names} at {self.heart_rate} bpm"
+
+    @property
+    def n_sig(self):
+        return len(self.lead_names)
+
+    def _template(self, waves):
+        t = np.arange(int(np.floor(BEAT_SPAN[0] * self.fs)), int(np.ceil(BEAT_SPAN[1] * self.fs)) + 1) / self.fs
+        shapes = waves[:, 2, None] * np.exp(-0.5 * ((t - waves[:, 0, None]) / waves[:, 1, None]) ** 2)  # (5, window)
+        gains = np.array([LEAD_GAINS[lead_name] for lead_name in self.lead_names])  # (n_sig, 5)
+        return gains @ shapes
+
+    def beats(self, n_samples):
+        # the schedule is drawn in fixed blocks of beats, so a longer record extends a shorter one with the same seed
+        mean_rr = 60.0 / self.heart_rate
+        phases = np.random.RandomState([self.seed, 0]).uniform(0, 2 * np.pi, size=2)
+        n_beats = int(np.ceil(n_samples / self.fs / mean_rr / (1 - self.lf_amplitude - self.hf_amplitude) * 1.1)) + 2
+        n_blocks = -(-n_beats // BEAT_BLOCK)
+        jitter, draws = [], []
+        for block in range(n_blocks):
+            rng = np.random.RandomState([self.seed, 0, block])
+            jitter.append(rng.randn(BEAT_BLOCK))
+            draws.append(rng.uniform(size=BEAT_BLOCK))
+        t = np.arange(n_blocks * BEAT_BLOCK) * mean_rr
+        rr = mean_rr * (1 + self.lf_amplitude * np.sin(2 * np.pi * 0.1 * t + phases[0])
+                        + self.hf_amplitude * np.sin(2 * np.pi * 0.25 * t + phases[1])
+                        + self.rr_jitter * np.concatenate(jitter))
+        ectopic = np.concatenate(draws) < self.ectopic_rate
+        ectopic[:2] = False
+        ectopic[1:] &= ~ectopic[:-1]
+        # premature ventricular beats come early and are followed by a compensatory pause
+        rr[ectopic] *= 0.65
+        rr[1:][ectopic[:-1]] *= 1.35
+        samples = np.rint((np.cumsum(rr) - rr[0] / 2) * self.fs).astype(np.int64)
+        keep = samples < n_samples
+        return samples[keep], np.where(ectopic, PVC, NORMAL_BEAT)[keep]
+
+    def artefacts(self, n_samples):
+        # bursts are drawn per hour of signal, again independent of the record length
+        hour = int(round(3600 * self.fs))
+        starts, stops = [], []
+        for block in range(-(-n_samples // hour)):
+            rng = np.random.RandomState([self.seed, 1, block])
+            n = rng.poisson(self.artefact_rate)
+            block_starts = block * hour + np.sort(rng.randint(0, hour, size=n))
+            starts.append(block_starts)
+            stops.append(block_starts + (rng.uniform(*self.artefact_duration, size=n) * self.fs).astype(np.int64))
+        starts = np.concatenate(starts) if starts else np.empty(0, dtype=np.int64)
+        stops = np.concatenate(stops) if stops else np.empty(0, dtype=np.int64)
+        keep = starts < n_samples
+        return starts[keep], np.minimum(stops[keep], n_samples)
+
+    def annotation(self, n_samples):
+        samples, labels = self.beats(n_samples)
+        starts, _ = self.artefacts(n_samples)
+        indices = np.concatenate([samples, starts])
+        labels = np.concatenate([labels, np.full(len(starts), ARTEFACT)])
+        order = np.argsort(indices, kind="stable")
+        return ECGAnnotation.from_arrays(indices[order], labels[order])
+
+    def _noise(self, start, stop):
+        # white noise is drawn in fixed blocks so that the output does not depend on the chunk size
+        blocks = []
+        for block in range(start // NOISE_BLOCK, (stop - 1) // NOISE_BLOCK + 1):
+            noise = np.random.RandomState([self.seed, 2, block]).randn(self.n_sig, NOISE_BLOCK)
+            blocks.append(noise)
+        noise = np.concatenate(blocks, axis=1)
+        offset = start // NOISE_BLOCK * NOISE_BLOCK
+        return noise[:, start - offset:stop - offset]
+
+    def render(self, start, stop, beats=None, artefacts=None):
+        beats = self.beats(stop) if beats is None else beats
+        artefacts = self.artefacts(stop) if artefacts is None else artefacts
+        n = stop - start
+        block = np.zeros((self.n_sig, n))
+        if n <= 0:
+            return block
+        pre = -int(np.floor(BEAT_SPAN[0] * self.fs))
+        for label, template in self._templates.items():
+            samples = beats[0][beats[1] == label]
+            lo, hi = np.searchsorted(samples, [start - template.shape[1] + pre, stop + pre])
+            positions = (samples[lo:hi, None] - pre + np.arange(template.shape[1])).reshape(-1) - start
+            inside = (positions >= 0) & (positions < n)
+            for i in range(self.n_sig):
+                weights = np.broadcast_to(template[i], (hi - lo, template.shape[1])).reshape(-1)
+                block[i] += np.bincount(positions[inside], weights=weights[inside], minlength=n)
+        t = np.arange(start, stop) / self.fs
+        phases = np.random.RandomState([self.seed, 3]).uniform(0, 2 * np.pi, size=(self.n_sig, 2))
+        block += self.wander_amplitude * (np.sin(2 * np.pi * 0.15 * t + phases[:, :1]) +
+                                          0.5 * np.sin(2 * np.pi * 0.33 * t + phases[:, 1:]))
+        noise = self._noise(start, stop)
+        scale = np.full(n, self.noise_std)
+        for artefact_start, artefact_stop in zip(*artefacts):
+            scale[max(artefact_start - start, 0):max(artefact_stop - start, 0)] = self.artefact_std
+        return block + noise * scale
+
+    def chunks(self, n_samples, chunk_size=1 << 18):
+        beats, artefacts = self.beats(n_samples), self.artefacts(n_samples)
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            yield start, self.render(start, stop, beats, artefacts)
+
+    def record(self, duration, name="synthetic"):
+        n_samples = int(round(duration * self.fs))
+        signal = self.render(0, n_samples, self.beats(n_samples), self.artefacts(n_samples))
+        record = ECGRecord(name, Time.from_fs_samples(self.fs, n_samples))
+        for row, lead_name in zip(signal, self.lead_names):
+            record.add_signal(Signal.from_array(row, lead_name))
+        record.annotations = self.annotation(n_samples)
+        return record
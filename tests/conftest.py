@@ -1,11 +1,56 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-    Dummy conftest.py for pyecg.
+    Shared fixtures for pyecg tests.
 
-    If you don't know what this is for, just leave it empty.
     Read more about conftest.py under:
     https://pytest.org/latest/plugins.html
 """
 
-# import pytest
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+
+
+@pytest.fixture(scope="module")
+def record():
+    return ECGRecord.from_wfdb("tests/wfdb/100")
+
+
+def _write_edf(path, signals, labels, fs=250, annotations=None, onsets=None, plus="EDF+C", extra=None):
+    # minimal EDF(+) writer: one second data records, int16 digital values in [-32768, 32767] mapped onto [-5, 5] mV
+    n_records = signals.shape[1] // fs
+    channels = [(label, fs) for label in labels] + (extra or [])
+    if annotations is not None:
+        channels.append(("EDF Annotations", 30))
+    ns = len(channels)
+
+    def field(values, width):
+        return b"".join(str(v).ljust(width)[:width].encode("ascii") for v in values)
+    header = field(["0"], 8) + field(["X X X X"], 80) + field(["Startdate X X X X"], 80) + field(["01.01.20"], 8) + \
+        field(["00.00.00"], 8) + field([256 * (ns + 1)], 8) + field([plus if annotations is not None else ""], 44) + \
+        field([n_records], 8) + field([1], 8) + field([ns], 4)
+    header += field([c[0] for c in channels], 16) + field([""] * ns, 80) + field(["mV"] * ns, 8)
+    header += field([-5] * ns, 8) + field([5] * ns, 8) + field([-32768] * ns, 8) + field([32767] * ns, 8)
+    header += field([""] * ns, 80) + field([c[1] for c in channels], 8) + field([""] * ns, 32)
+    digital = np.round((signals + 5) / 10 * 65535 - 32768).astype("<i2")
+    with open(path, "wb") as f:
+        f.write(header)
+        for r in range(n_records):
+            f.write(digital[:, r * fs:(r + 1) * fs].tobytes())
+            for _, n in (extra or []):
+                f.write(np.zeros(n, dtype="<i2").tobytes())
+            if annotations is not None:
+                onset = onsets[r] if onsets is not None else r
+                tal = f"+{onset}\x14\x14\x00".encode()
+                for ann_onset, text in annotations:
+                    if onset <= ann_onset < onset + 1:
+                        tal += f"+{ann_onset}\x1520\x14{text}\x14\x00".encode()
+                f.write(tal.ljust(60, b"\x00"))
+    return (digital.astype(float) + 32768) / 65535 * 10 - 5
+
+
+@pytest.fixture
+def write_edf():
+    return _write_edf
@@ -0,0 +1,99 @@
+import base64
+
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.importers import AECGLoader
+
+LEADS = ["I", "II", "AVR"]
+
+
+def write_aecg(path, digits, beats=(), b64=False, fs=500):
+    def sequence(lead, values):
+        if b64:
+            encoded = base64.b64encode(values.astype("<i2").tobytes()).decode()
+            digits_xml = f'<digits representation="B64">{encoded}</digits>'
+        else:
+            digits_xml = f'<digits>{" ".join(str(v) for v in values)}</digits>'
+        return f'''<component><sequence><code code="MDC_ECG_LEAD_{lead}" codeSystem="2.16.840.1.113883.6.24"/>
+            <value xsi:type="SLIST_PQ"><origin value="0" unit="uV"/><scale value="5" unit="uV"/>{digits_xml}</value>
+            </sequence></component>'''
+
+    def annotation(time_ms, code):
+        return f'''<component><annotation><code code="MDC_ECG_BEAT"/><value xsi:type="CE" code="{code}"/>
+            <component><annotation><code code="MDC_ECG_WAVC"/><value xsi:type="CE" code="MDC_ECG_WAVC_QRSWAVE"/>
+            <support><supportingROI><component><boundary><code code="TIME_RELATIVE"/>
+            <value xsi:type="IVL_PQ"><low value="{time_ms - 40}" unit="ms"/></value></boundary></component>
+            </supportingROI></support></annotation></component>
+            <support><supportingROI><component><boundary><code code="TIME_RELATIVE"/>
+            <value xsi:type="IVL_PQ"><low value="{time_ms}" unit="ms"/><high value="{time_ms + 10}" unit="ms"/></value>
+            </boundary></component></supportingROI></support></annotation></component>'''
+
+    median = "".join(sequence(lead, np.arange(10) * (k + 1)) for k, lead in enumerate(LEADS))
+    xml = f'''<?xml version="1.0" encoding="UTF-8"?>
+    <AnnotatedECG xmlns="urn:hl7-org:v3" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+    <component><series><code code="RHYTHM"/>
+    <component><sequenceSet>
+    <component><sequence><code code="TIME_ABSOLUTE"/><value xsi:type="GLIST_TS"><head value="20200101000000"/>
+        <increment value="{1000 / fs}" unit="ms"/></value></sequence></component>
+    {"".join(sequence(lead, values) for lead, values in zip(LEADS, digits))}
+    </sequenceSet></component>
+    <derivation><derivedSeries><component><sequenceSet>{median}</sequenceSet></component></derivedSeries></derivation>
+    <subjectOf><annotationSet>{"".join(annotation(t, code) for t, code in beats)}</annotationSet></subjectOf>
+    </series></component></AnnotatedECG>'''
+    with open(path, "w") as f:
+        f.write(xml)
+
+
+@pytest.fixture
+def digits():
+    return np.random.RandomState(0).randint(-400, 400, (3, 5000))
+
+
+@pytest.mark.parametrize("b64", [False, True])
+def test_load(tmp_path, digits, b64):
+    path = str(tmp_path / "resting.xml")
+    write_aecg(path, digits, beats=[(1000, "MDC_ECG_BEAT_NORMAL"), (200, "MDC_ECG_BEAT_PVC"),
+                                    (1500, "MDC_ECG_BEAT_OTHER")], b64=b64)
+    record = ECGRecord.from_aecg(path)
+    assert record.record_name == "resting"
+    assert record.lead_names == ["I", "II", "aVR"]
+    assert record.time.fs == 500
+    assert len(record) == 5000
+    assert np.allclose(record.p_signal, digits * 0.005)
+    assert [(a.index, a.label) for a in record.annotations] == [(100, "V"), (500, "N")]
+
+
+def test_load_derived(tmp_path, digits):
+    path = str(tmp_path / "resting.xml")
+    write_aecg(path, digits, beats=[(1000, "MDC_ECG_BEAT_NORMAL")])
+    rhythm = ECGRecord.from_aecg(path)
+    median = ECGRecord.from_aecg(path, derived=True)
+    assert len(rhythm) == 5000
+    assert median.record_name == "resting_derived"
+    assert median.lead_names == ["I", "II", "aVR"]
+    assert median.time.fs == 500
+    assert len(median) == 10
+    assert np.allclose(median.p_signal, np.arange(10) * np.arange(1, 4)[:, None] * 0.005)
+    assert len(median.annotations) == 0
+
+
+def test_file_notfound():
+    with pytest.raises(FileNotFoundError):
+        ECGRecord.from_aecg("tests/aecg/nonexistent.xml")
+
+
+def test_inconsistent_lead_length(tmp_path, digits):
+    path = str(tmp_path / "bad.xml")
+    write_aecg(path, [digits[0], digits[1, :10], digits[2]])
+    with pytest.raises(ValueError):
+        ECGRecord.from_aecg(path)
+
+
+def test_load_many(tmp_path, digits):
+    for k in range(5):
+        write_aecg(str(tmp_path / f"ecg_{k}.xml"), digits + k)
+    records = AECGLoader().load_many(str(tmp_path), max_workers=2, chunksize=2)
+    assert [r.record_name for r in records] == [f"ecg_{k}" for k in range(5)]
+    assert np.allclose(records[3].p_signal, (digits + 3) * 0.005)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.annotations import ECGAnnotation
+from pyecg.synthetic import SyntheticECG
+
+pa = pytest.importorskip("pyarrow")
+from pyecg.arrow import write_corpus, read_corpus  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def synthetic_record():
+    return SyntheticECG(artefact_rate=20).record(120, name="synthetic")
+
+
+def test_record_roundtrip(synthetic_record):
+    table = synthetic_record.to_arrow()
+    assert table.column_names == ["time", "MLII", "V5"]
+    assert table.num_rows == len(synthetic_record)
+    # the Arrow columns wrap the record buffers
+    assert np.shares_memory(table.column("MLII").chunks[0].to_numpy(), synthetic_record.get_lead("MLII").seq_data)
+    restored = ECGRecord.from_arrow(table, annotations=synthetic_record.annotations.to_arrow())
+    assert restored.record_name == "synthetic" and restored.lead_names == synthetic_record.lead_names
+    assert restored.fs == synthetic_record.fs and restored.time.is_uniform
+    assert np.array_equal(restored.p_signal, synthetic_record.p_signal)
+    assert restored.annotations == synthetic_record.annotations
+    assert np.shares_memory(restored.get_lead("V5").seq_data, table.column("V5").chunks[0].to_numpy())
+
+
+def test_list_backed_record(record):
+    record = record[:5000]
+    restored = ECGRecord.from_arrow(record.to_arrow())
+    assert np.array_equal(restored.p_signal, record.p_signal)
+    assert np.allclose(np.asarray(restored.time), np.asarray(record.time))
+
+
+def test_segmented_record(synthetic_record):
+    joined = ECGRecord.concat([synthetic_record[:1000], synthetic_record[1000:3000]])
+    table = joined.to_arrow()
+    assert table.column("MLII").num_chunks == 2
+    restored = ECGRecord.from_arrow(table)
+    assert np.array_equal(restored.p_signal, synthetic_record[:3000].p_signal)
+
+
+def test_annotation_table(synthetic_record):
+    table = synthetic_record.annotations.to_arrow()
+    assert table.column_names == ["index", "label"]
+    assert pa.types.is_dictionary(table.column("label").type)
+    assert ECGAnnotation.from_arrow(table) == synthetic_record.annotations
+
+
+@pytest.mark.parametrize("format", ["parquet", "ipc"])
+def test_corpus(tmp_path, format):
+    generator = SyntheticECG(artefact_rate=20)
+    records = [generator.record(30, name=f"r{k}") for k in range(3)]
+    signals, annotations = str(tmp_path / "signals"), str(tmp_path / "annotations")
+    write_corpus(records, signals, annotations_path=annotations, format=format, row_group_size=1000)
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        assert pq.ParquetFile(signals).metadata.num_row_groups == 3 * 8
+    restored = read_corpus(signals, annotations_path=annotations, format=format)
+    assert [r.record_name for r in restored] == ["r0", "r1", "r2"]
+    for original, copy in zip(records, restored):
+        assert copy.time.fs == original.fs and copy.time.is_uniform and copy.fs == original.fs
+        assert copy.lead_names == original.lead_names
+        assert np.array_equal(copy.p_signal, original.p_signal)
+        assert copy.annotations == original.annotations
+    with pytest.raises(ValueError):
+        write_corpus(records, signals, format="csv")
+
+
+@pytest.mark.parametrize("format", ["parquet", "ipc"])
+def test_corpus_duplicate_names(tmp_path, format):
+    generator = SyntheticECG(artefact_rate=20)
+    records = [generator.record(duration, name=name) for duration, name in [(10, "a"), (20, "b"), (30, "a")]]
+    signals, annotations = str(tmp_path / "signals"), str(tmp_path / "annotations")
+    write_corpus(records, signals, annotations_path=annotations, format=format, row_group_size=1000)
+    restored = read_corpus(signals, annotations_path=annotations, format=format)
+    assert [r.record_name for r in restored] == ["a", "b", "a"]
+    assert [len(r) for r in restored] == [len(r) for r in records]
+    for original, copy in zip(records, restored):
+        assert np.array_equal(copy.p_signal, original.p_signal)
+        assert copy.annotations == original.annotations
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample
+from pyecg.clustering import BeatClusterer
+
+
+def two_morphology_record(fs=200, n_beats=60, jitter=5, seed=0):
+    rng = np.random.RandomState(seed)
+    t = np.arange(-0.25 * fs, 0.4 * fs + 1) / fs
+    normal = np.exp(-(t / 0.01) ** 2) - 0.2 * np.exp(-((t - 0.2) / 0.04) ** 2)
+    ectopic = -0.8 * np.exp(-(t / 0.04) ** 2)
+    peaks = (np.arange(n_beats) + 1) * fs
+    shifts = rng.randint(-jitter, jitter + 1, size=n_beats)
+    signal = 0.01 * rng.randn((n_beats + 2) * fs)
+    labels = np.where(np.arange(n_beats) % 5 == 4, "V", "N")
+    for peak, shift, label in zip(peaks, shifts, labels):
+        beat = ectopic if label == "V" else normal
+        signal[peak + shift - int(0.25 * fs):peak + shift + int(0.4 * fs) + 1] += beat
+    record = ECGRecord("beats", Time.from_fs_samples(fs, len(signal)))
+    record.add_signal(Signal.from_array(signal, "II"))
+    record.annotations = ECGAnnotation([ECGAnnotationSample(int(p), str(l)) for p, l in zip(peaks, labels)])
+    return record, shifts
+
+
+@pytest.mark.parametrize("batch_size", [7, 4096])
+def test_two_morphologies(batch_size):
+    record, shifts = two_morphology_record()
+    clusters = BeatClusterer(batch_size=batch_size).fit(record)
+    assert len(clusters) == 2
+    assert clusters.counts.tolist() == [48, 12]
+    assert clusters.label_counts(0) == {"N": 48} and clusters.label_counts(1) == {"V": 12}
+    assert np.array_equal(clusters.members(1), np.arange(4, 60, 5))
+    for k in range(len(clusters)):
+        offset = clusters.shifts - shifts
+        assert np.ptp(offset[clusters.assignment == k]) == 0
+    assert clusters.templates.shape == (2, 1, 131)
+    assert np.argmax(clusters.templates[0, 0]) == clusters.pre
+
+
+def test_merge():
+    record, shifts = two_morphology_record()
+    unmerged = BeatClusterer(threshold=0.999, merge_threshold=1.1).fit(record)
+    assert len(unmerged) > 2
+    clusters = BeatClusterer(threshold=0.999, merge_threshold=0.9).fit(record)
+    assert clusters.counts.tolist() == [48, 12]
+    offset = clusters.shifts - shifts
+    assert all(np.ptp(offset[clusters.assignment == k]) == 0 for k in range(len(clusters)))
+
+
+def test_mitdb(record):
+    clusters = BeatClusterer().fit(record)
+    assert clusters.counts[0] > 2100
+    pvc = clusters.assignment[clusters.labels == "V"][0]
+    assert clusters.label_counts(pvc) == {"V": 1}
+
+
+def test_edge_beats_are_left_out(record):
+    clusters = BeatClusterer().fit(record[:60000])
+    assert len(clusters.samples) == 205
+    assert clusters.samples.min() > 77 and clusters.samples.max() < 59919
+    assert clusters.counts.sum() == 205
+
+
+def test_no_annotations():
+    record, _ = two_morphology_record()
+    record.annotations = None
+    with pytest.raises(ValueError):
+        BeatClusterer().fit(record)
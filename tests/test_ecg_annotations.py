@@ -70,3 +70,18 @@ def test_inequality_2():
                                  ECGAnnotationSample("N", 4),
                                  ECGAnnotationSample("N", 6)])
     assert annotation1 != annotation2
+
+
+def test_shift():
+    annotation = ECGAnnotation([ECGAnnotationSample(1, "N"), ECGAnnotationSample(5, "V")])
+    assert annotation.shift(10) == ECGAnnotation([ECGAnnotationSample(11, "N"), ECGAnnotationSample(15, "V")])
+    assert annotation == ECGAnnotation([ECGAnnotationSample(1, "N"), ECGAnnotationSample(5, "V")])
+
+
+def test_windows():
+    annotation = ECGAnnotation([ECGAnnotationSample(1, "N"), ECGAnnotationSample(5, "V"), ECGAnnotationSample(9, "N")])
+    windows = annotation.windows([0, 4, 6, 9], [5, 10, 8, 9])
+    assert windows[0] == ECGAnnotation([ECGAnnotationSample(1, "N")])
+    assert windows[1] == ECGAnnotation([ECGAnnotationSample(1, "V"), ECGAnnotationSample(5, "N")])
+    assert len(windows[2]) == 0 and len(windows[3]) == 0
+    assert annotation.window(4, 10) == windows[1]
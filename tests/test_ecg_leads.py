@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord, LeadTransform, LIMB_LEADS, INVERSE_DOWER, DerivedSignal
+from pyecg.importers import ISHINELoader
+
+
+def limb_record(samples=100):
+    lead_i, lead_ii = np.random.rand(2, samples)
+    return ECGRecord.from_np_array("100", np.arange(samples), np.array([lead_i, lead_ii]), ["I", "II"])
+
+
+@pytest.mark.parametrize("matrix", [[[1, 0]], [[1, 0, 0], [0, 1, 0]]])
+def test_bad_matrix_shape(matrix):
+    with pytest.raises(ValueError):
+        LeadTransform(["I", "II"], ["III", "aVR"], matrix)
+
+
+def test_limb_leads():
+    record = limb_record()
+    record.add_derived_leads(LIMB_LEADS)
+    lead_i, lead_ii = np.asarray(record.get_lead("I")), np.asarray(record.get_lead("II"))
+    assert record.lead_names == ["I", "II", "III", "aVR", "aVL", "aVF"]
+    assert isinstance(record.get_lead("III"), DerivedSignal)
+    assert np.allclose(record.get_lead("III")[:], lead_ii - lead_i)
+    assert np.allclose(record.get_lead("aVR")[:], -(lead_i + lead_ii) / 2)
+    assert np.allclose(record.get_lead("aVL")[5:10], (lead_i - lead_ii / 2)[5:10])
+    assert np.isclose(record.get_lead("aVF")[3], lead_ii[3] - lead_i[3] / 2)
+    assert len(record.get_lead("aVF")) == len(record)
+
+
+def test_p_signal():
+    record = limb_record()
+    record.add_derived_leads(LIMB_LEADS)
+    lead_i, lead_ii = record.p_signal[:2]
+    expected = np.array([lead_i, lead_ii, lead_ii - lead_i, -(lead_i + lead_ii) / 2, lead_i - lead_ii / 2,
+                         lead_ii - lead_i / 2])
+    assert np.allclose(record.p_signal, expected)
+
+
+def test_slicing():
+    record = limb_record()
+    record.add_derived_leads(LIMB_LEADS)
+    record_sliced = record[10:20]
+    assert len(record_sliced.get_lead("III")) == 10
+    assert record_sliced.get_lead("III").sources[0] is record_sliced.get_lead("I")
+    assert np.allclose(record_sliced.p_signal, record.p_signal[:, 10:20])
+
+
+def test_replace_existing_lead():
+    signal = np.random.rand(3, 50)
+    record = ECGRecord.from_np_array("100", np.arange(50), signal, ["I", "II", "III"])
+    record.add_derived_leads(LIMB_LEADS)
+    assert record.lead_names == ["I", "II", "III", "aVR", "aVL", "aVF"]
+    assert np.allclose(record.get_lead("III")[:], signal[1] - signal[0])
+
+
+def test_restrict():
+    record = limb_record()
+    record.add_derived_leads(LIMB_LEADS.restrict(["aVF", "III"]))
+    lead_i, lead_ii = record.p_signal[:2]
+    assert record.lead_names == ["I", "II", "aVF", "III"]
+    assert np.allclose(record.p_signal[2:], [lead_ii - lead_i / 2, lead_ii - lead_i])
+    with pytest.raises(ValueError):
+        LIMB_LEADS.restrict(["V1"])
+
+
+def test_ishine_limb_leads_in_file():
+    assert ISHINELoader._limb_leads(["I", "II", "V5"]) is None
+    assert ISHINELoader._limb_leads(["I", "V5", "aVF"]) is None
+    assert ISHINELoader._limb_leads(["I", "II", "aVL", "V5"]).target_leads == ["aVL"]
+
+
+def test_missing_source_lead():
+    record = limb_record()
+    with pytest.raises(ValueError):
+        record.add_derived_leads(INVERSE_DOWER)
+
+
+@pytest.mark.parametrize("ecg_path", ["tests/ishine/ECG_P28.01.ecg"])
+def test_ishine_derived_limb_leads(ecg_path):
+    record = ECGRecord.from_ishine(ecg_path)
+    record_derived = ECGRecord.from_ishine(ecg_path, derive_limb_leads=True)
+    assert record_derived.lead_names == record.lead_names
+    assert isinstance(record_derived.get_lead("aVF"), DerivedSignal)
+    assert np.allclose(record_derived.p_signal, record.p_signal, atol=0.005)
+    record_derived.add_derived_leads(INVERSE_DOWER)
+    assert record_derived.lead_names[-3:] == ["X", "Y", "Z"]
+    assert record_derived.p_signal.shape == (15, len(record))
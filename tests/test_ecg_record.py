@@ -3,6 +3,7 @@ import pytest
 from scipy.misc import electrocardiogram
 
 from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample
 
 
 @pytest.mark.parametrize("fs, samples", [(360, 10), (250, 20), (360.0, 30)])
@@ -129,3 +130,104 @@ def test_p_signal(time, signal):
 def test_p_signal_shape(time, signal):
     record = ECGRecord.from_np_array("100", time, signal, ["I", "II", "III"])
     assert np.array_equal(record.p_signal.shape, (3, 6))
+
+
+@pytest.mark.parametrize("time, signal", [(Time.from_fs_samples(10, 6), np.array([[1, 2, 3, 4, 5, 6],
+                                                                                  [5, 6, 7, 8, 9, 10]])),
+                                          (Time.from_timestamps([0, 0.1, 0.2, 0.3, 0.4, 0.5]),
+                                           np.array([[1, 2, 3, 4, 5, 6],
+                                                     [5, 6, 7, 8, 9, 10]]))])
+def test_between(time, signal):
+    record = ECGRecord("100", time)
+    for s, name in zip(signal, ["I", "II"]):
+        record.add_signal(Signal(s, name))
+    record_sliced = record.between(0.1, 0.3)
+    assert len(record_sliced) == 2
+    assert record_sliced.get_lead("I") == [2, 3]
+    assert record_sliced.get_lead("II") == [6, 7]
+
+
+@pytest.mark.parametrize("time, signal", [(Time.from_fs_samples(10, 6), np.array([[1, 2, 3, 4, 5, 6],
+                                                                                  [5, 6, 7, 8, 9, 10]])),
+                                          (Time.from_timestamps([0, 0.1, 0.2, 0.3, 0.4, 0.5]),
+                                           np.array([[1, 2, 3, 4, 5, 6],
+                                                     [5, 6, 7, 8, 9, 10]]))])
+def test_at(time, signal):
+    record = ECGRecord("100", time)
+    for s, name in zip(signal, ["I", "II"]):
+        record.add_signal(Signal(s, name))
+    sample = record.at(0.21)
+    assert len(sample) == 1
+    assert np.isclose(sample.time[0], 0.2)
+    assert sample.get_lead("I")[0] == 3 and sample.get_lead("II")[0] == 7
+    assert np.array_equal(record.at_many([0.0, 0.21, 0.48]), [[1, 3, 6], [5, 7, 10]])
+
+
+def test_between_many():
+    record = ECGRecord.from_np_array("100", np.arange(100) / 10, np.random.rand(2, 100), ["I", "II"])
+    windows = record.between_many([0.0, 2.0, 5.05], [1.0, 2.5, 9.0])
+    assert [len(w) for w in windows] == [10, 5, 39]
+
+
+def test_window_annotations():
+    record = ECGRecord.from_np_array("100", np.arange(100) / 10, np.random.rand(2, 100), ["I", "II"])
+    record.annotations = ECGAnnotation([ECGAnnotationSample(5, "N"), ECGAnnotationSample(25, "V"),
+                                        ECGAnnotationSample(60, "N")])
+    assert record.between(2.0, 5.0).annotations == ECGAnnotation([ECGAnnotationSample(5, "V")])
+    windows = record.between_many([0.0, 3.0], [3.0, 5.0])
+    assert windows[0].annotations == ECGAnnotation([ECGAnnotationSample(5, "N"), ECGAnnotationSample(25, "V")])
+    assert len(windows[1].annotations) == 0
+    assert record.at(2.52).annotations == ECGAnnotation([ECGAnnotationSample(0, "V")])
+    assert len(record.annotations) == 3
+
+
+def records_to_concat():
+    record_a = ECGRecord.from_np_array("a", np.arange(4) / 10, np.array([[1, 2, 3, 4], [5, 6, 7, 8]]), ["I", "II"])
+    record_b = ECGRecord.from_np_array("b", np.arange(3) / 10, np.array([[9, 10, 11], [12, 13, 14]]), ["I", "II"])
+    record_a.annotations = ECGAnnotation([ECGAnnotationSample(1, "N"), ECGAnnotationSample(3, "V")])
+    record_b.annotations = ECGAnnotation([ECGAnnotationSample(0, "N")])
+    return record_a, record_b
+
+
+def test_concat():
+    record_a, record_b = records_to_concat()
+    record = ECGRecord.concat([record_a, record_b])
+    assert len(record) == 7
+    assert record.record_name == "a"
+    assert np.array_equal(record.p_signal, [[1, 2, 3, 4, 9, 10, 11], [5, 6, 7, 8, 12, 13, 14]])
+    assert np.allclose(record.time.time, np.arange(7) / 10)
+    assert record.annotations == ECGAnnotation([ECGAnnotationSample(1, "N"), ECGAnnotationSample(3, "V"),
+                                                ECGAnnotationSample(4, "N")])
+
+
+def test_concat_slicing_across_segments():
+    record_a, record_b = records_to_concat()
+    record_sliced = ECGRecord.concat([record_a, record_b])[2:6]
+    assert np.array_equal(record_sliced.p_signal, [[3, 4, 9, 10], [7, 8, 12, 13]])
+    assert len(record_sliced.get_lead("I").seq_data.segments) == 2
+
+
+def test_concat_uniform_time():
+    record_a = ECGRecord("a", Time.from_fs_samples(10, 4))
+    record_b = ECGRecord("b", Time.from_fs_samples(10, 3))
+    record = ECGRecord.concat([record_a, record_b])
+    assert record.time.is_uniform
+    assert len(record) == 7
+    window = ECGRecord.concat([record[2:4], record[4:7]])
+    assert window.time.is_uniform
+    assert np.allclose(window.time.time, np.arange(2, 7) / 10)
+    assert len(window.between(0.3, 0.5)) == 2
+
+
+def test_concat_with_gap():
+    record_a, record_b = records_to_concat()
+    record = ECGRecord.concat([record_a, record_b], gaps=[1.0])
+    assert np.allclose(record.time.time, [0, 0.1, 0.2, 0.3, 1.4, 1.5, 1.6])
+    assert len(record.between(0.35, 1.45)) == 1
+
+
+def test_concat_inconsistent_leads():
+    record_a, _ = records_to_concat()
+    record_b = ECGRecord.from_np_array("b", np.arange(3), np.random.rand(1, 3), ["I"])
+    with pytest.raises(ValueError):
+        ECGRecord.concat([record_a, record_b])
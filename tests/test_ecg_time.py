@@ -45,3 +45,60 @@ def test_from_time_stamp_not_monotonic(time_stamps):
 def test_length(fs, samples):
     time = Time.from_fs_samples(fs, samples)
     assert len(time.time) == samples
+
+
+@pytest.mark.parametrize("fs, samples", [(360, 1000), (250, 2000), (500.0, 3000)])
+def test_searchsorted_uniform_matches_timestamps(fs, samples):
+    uniform = Time.from_fs_samples(fs, samples)
+    irregular = Time.from_timestamps(uniform.time)
+    t = np.random.uniform(-1, samples / fs + 1, 500)
+    for side in ["left", "right"]:
+        assert np.array_equal(uniform.searchsorted(t, side), irregular.searchsorted(t, side))
+
+
+@pytest.mark.parametrize("fs, samples", [(360, 1000), (250, 2000)])
+def test_searchsorted_on_grid(fs, samples):
+    time = Time.from_fs_samples(fs, samples)
+    assert np.array_equal(time.searchsorted(time.time), np.arange(samples))
+    assert np.array_equal(time.searchsorted(time.time, side="right"), np.arange(1, samples + 1))
+
+
+@pytest.mark.parametrize("k", [604799999, 3 * 86400000, 10 ** 9 + 7])
+def test_searchsorted_long_record(k):
+    # a week and more at 1 kHz, where k * (1 / fs) is off by more than an absolute 1e-9 samples
+    time = Time.from_fs_samples(1000, 4)
+    time.seq_data = (1 / 1000) * np.arange(k - 2, k + 2)
+    assert np.array_equal(time.searchsorted(time.time), np.arange(4))
+    assert np.array_equal(time.searchsorted(time.time, side="right"), np.arange(1, 5))
+
+
+@pytest.mark.parametrize("time_stamps, t, expected", [([0, 1, 2, 4, 8], [0.4, 0.6, 2.9, 3.1, 100, -5], [0, 1, 2, 3, 4, 0])])
+def test_nearest_index_irregular(time_stamps, t, expected):
+    time = Time.from_timestamps(time_stamps)
+    assert np.array_equal(time.nearest_index(t), expected)
+
+
+@pytest.mark.parametrize("fs, samples", [(360, 100), (250, 200)])
+def test_nearest_index_uniform(fs, samples):
+    time = Time.from_fs_samples(fs, samples)
+    assert np.array_equal(time.nearest_index(time.time + 0.4 / fs), np.arange(samples))
+    assert time.nearest_index(-1) == 0
+    assert time.nearest_index(samples) == samples - 1
+
+
+@pytest.mark.parametrize("fs, samples", [(360, 100), (250, 200)])
+def test_slicing_keeps_uniform_lookup(fs, samples):
+    time = Time.from_fs_samples(fs, samples)
+    sliced = time.slice(slice(10, 50))
+    assert sliced.is_uniform
+    assert sliced.searchsorted(time.time[10]) == 0
+    assert sliced.searchsorted(time.time[20]) == 10
+    strided = time.slice(slice(0, 50, 2))
+    assert strided.fs == fs / 2
+    assert strided.searchsorted(time.time[20]) == 10
+
+
+def test_index_between_bad_order():
+    time = Time.from_fs_samples(360, 100)
+    with pytest.raises(ValueError):
+        time.index_between([0.1, 0.2], [0.2, 0.1])
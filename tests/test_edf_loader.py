@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.importers import edf
+
+FS = 250
+N_RECORDS = 10
+
+
+@pytest.fixture
+def edf_file(tmp_path, write_edf):
+    signals = np.sin(np.arange(2 * N_RECORDS * FS).reshape(2, -1) / 50)
+    path = str(tmp_path / "sample.edf")
+    expected = write_edf(path, signals, ["I", "II"], annotations=[(0.5, "N"), (3.25, "V"), (9.998, "N")])
+    return path, expected
+
+
+def test_file_notfound():
+    with pytest.raises(FileNotFoundError):
+        ECGRecord.from_edf("tests/edf/nonexistent.edf")
+
+
+def test_load(edf_file):
+    path, expected = edf_file
+    record = ECGRecord.from_edf(path)
+    assert record.record_name == "sample"
+    assert record.lead_names == ["I", "II"]
+    assert len(record) == N_RECORDS * FS
+    assert record.time.fs == FS
+    assert np.allclose(record.p_signal, expected)
+    assert np.allclose(record.get_lead("II")[245:255], expected[1, 245:255])
+    assert np.isclose(record.get_lead("I")[-1], expected[0, -1])
+    assert [(a.index, a.label) for a in record.annotations] == [(125, "N"), (812, "V"), (2499, "N")]
+
+
+def test_channel_and_time_selection(edf_file):
+    path, expected = edf_file
+    record = ECGRecord.from_edf(path, channels=["II"], start=3.0, stop=4.5)
+    assert record.lead_names == ["II"]
+    assert len(record) == 375
+    assert np.isclose(record.time[0], 3.0)
+    assert np.allclose(record.get_lead("II")[:], expected[1, 750:1125])
+    assert [(a.index, a.label) for a in record.annotations] == [(62, "V")]
+    assert len(record.between(3.0, 3.5)) == 125
+
+
+@pytest.mark.parametrize("plus", ["EDF+C", "EDF+D"])
+def test_window_reads_only_its_annotations(tmp_path, monkeypatch, write_edf, plus):
+    path = str(tmp_path / "sample.edf")
+    signals = np.sin(np.arange(2 * N_RECORDS * FS).reshape(2, -1) / 50)
+    write_edf(path, signals, ["I", "II"], annotations=[(0.5, "N"), (3.25, "V"), (8.5, "N")], plus=plus)
+    parsed, tal = [], edf.TAL
+
+    class CountingTAL:
+        def findall(self, raw):
+            parsed.append(raw)
+            return tal.findall(raw)
+    monkeypatch.setattr(edf, "TAL", CountingTAL())
+    window = ECGRecord.from_edf(path, start=3.0, stop=4.5)
+    assert [(a.index, a.label) for a in window.annotations] == [(62, "V")]
+    assert len(parsed) == 2  # data records 3 and 4
+    ECGRecord.from_edf(path)
+    assert len(parsed) == 2 + N_RECORDS
+
+
+def test_missing_channel(edf_file):
+    with pytest.raises(ValueError):
+        ECGRecord.from_edf(edf_file[0], channels=["V1"])
+
+
+def test_no_signal_channels(edf_file, tmp_path, write_edf):
+    with pytest.raises(ValueError):
+        ECGRecord.from_edf(edf_file[0], channels=[])
+    path = str(tmp_path / "annotations_only.edf")
+    write_edf(path, np.zeros((0, N_RECORDS * FS)), [], annotations=[(0.5, "N")])
+    with pytest.raises(ValueError):
+        ECGRecord.from_edf(path)
+
+
+def test_mixed_rates(tmp_path, write_edf):
+    path = str(tmp_path / "mixed.edf")
+    write_edf(path, np.zeros((1, N_RECORDS * FS)), ["I"], extra=[("Resp", 25)])
+    with pytest.raises(ValueError):
+        ECGRecord.from_edf(path)
+    assert ECGRecord.from_edf(path, channels=["I"]).n_sig == 1
+
+
+def test_discontinuous(tmp_path, write_edf):
+    path = str(tmp_path / "gaps.edf")
+    onsets = [0, 1, 2, 10, 11, 12, 13, 20, 21, 22]
+    signals = np.random.uniform(-1, 1, (1, N_RECORDS * FS))
+    expected = write_edf(path, signals, ["I"], annotations=[(11.5, "V")], onsets=onsets, plus="EDF+D")
+    record = ECGRecord.from_edf(path)
+    assert not record.time.is_uniform
+    assert np.isclose(record.time[3 * FS], 10.0)
+    assert [(a.index, a.label) for a in record.annotations] == [(4 * FS + FS // 2, "V")]
+    assert np.allclose(record.between(10, 12).p_signal, expected[:, 3 * FS:5 * FS])
+    window = ECGRecord.from_edf(path, start=10, stop=12)
+    assert len(window) == 2 * FS
+    assert np.isclose(window.time[0], 10.0)
+    assert np.allclose(window.p_signal, expected[:, 3 * FS:5 * FS])
+    assert [(a.index, a.label) for a in window.annotations] == [(FS + FS // 2, "V")]
+    # windows starting or ending inside a gap snap to the next recorded sample
+    assert np.isclose(ECGRecord.from_edf(path, start=5, stop=11).time[0], 10.0)
+    assert len(ECGRecord.from_edf(path, start=5, stop=11)) == FS
+    assert len(ECGRecord.from_edf(path, start=14, stop=19)) == 0
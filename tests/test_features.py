@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord, Time, Signal
+from pyecg.annotations import ECGAnnotation, ECGAnnotationSample
+from pyecg.features import BeatFeatureExtractor, FeatureTable
+from pyecg.shared import SharedRecord
+
+
+def spike_record(fs=250, samples=2500, beats=(300, 550, 900, 1500), amplitude=2.0, offset=0.5):
+    signal = np.full(samples, offset)
+    signal[list(beats)] += amplitude
+    record = ECGRecord("spikes", Time.from_fs_samples(fs, samples))
+    record.add_signal(Signal(signal, "II"))
+    record.annotations = ECGAnnotation([ECGAnnotationSample(18, "+")] +
+                                       [ECGAnnotationSample(b, "N") for b in beats])
+    return record
+
+
+def test_feature_table_length_mismatch():
+    with pytest.raises(ValueError):
+        FeatureTable({"a": np.arange(3), "b": np.arange(4)})
+
+
+def test_spike_features():
+    table = BeatFeatureExtractor().extract(spike_record())
+    assert len(table) == 4
+    assert np.array_equal(table["annotation_index"], [1, 2, 3, 4])
+    assert np.allclose(table["II_r_amplitude"], 2.0)
+    assert np.allclose(table["II_baseline"], 0.5)
+    assert np.allclose(table["II_qrs_width"], 1 / 250)
+    assert np.allclose(table["pre_rr"][1:], [1.0, 1.4, 2.4])
+    assert np.isnan(table["pre_rr"][0]) and np.isnan(table["post_rr"][-1])
+
+
+def test_label_selection():
+    table = BeatFeatureExtractor(labels=["+"]).extract(spike_record())
+    assert np.array_equal(table["annotation_index"], [0])
+
+
+def test_record_features(record):
+    table = BeatFeatureExtractor(bands=[(5, 15)]).extract(record)
+    assert len(table) == len(record.annotations.select_label("N")) + len(record.annotations.select_label("A")) + \
+        len(record.annotations.select_label("V"))
+    assert "MLII_energy_5_15hz" in table and "V5_qrs_width" in table
+    normal = table.select(table["label"] == "N")
+    assert np.nanmedian(normal["MLII_r_amplitude"]) > 0.5
+    assert 0.04 < np.nanmedian(normal["MLII_qrs_width"]) < 0.12
+    assert np.allclose(np.nanmedian(normal["pre_rr"]), 0.8, atol=0.1)
+
+
+def test_truncated_beats(record):
+    table = BeatFeatureExtractor().extract(record[:60000])
+    assert len(table) == 207 and table["sample"].max() < 60000
+    truncated = np.isnan(table["MLII_r_amplitude"])
+    assert table["sample"][truncated].tolist() == [77, 59919]
+    assert np.isnan(table["V5_energy_0.5_5hz"][truncated]).all()
+    assert not np.isnan(table["MLII_qrs_width"][~truncated]).any()
+
+
+def test_non_beat_labels():
+    record = spike_record()
+    record.annotations = record.annotations + ECGAnnotation([ECGAnnotationSample(i, label) for i, label in
+                                                             zip([700, 1200, 1300, 1700], ["~", "|", "[", "x"])])
+    table = BeatFeatureExtractor().extract(record)
+    assert table["sample"].tolist() == [300, 550, 900, 1500]
+
+
+def test_batching_consistent(record):
+    table = BeatFeatureExtractor().extract(record[:60000])
+    table_batched = BeatFeatureExtractor(batch_size=7).extract(record[:60000])
+    for key in table.keys():
+        assert np.array_equal(table[key], table_batched[key], equal_nan=table[key].dtype.kind == "f")
+
+
+def test_extract_many(record):
+    extractor = BeatFeatureExtractor()
+    with SharedRecord.export(record) as shared:
+        tables = extractor.extract_many([spike_record(), shared.handle], max_workers=2)
+    assert len(tables[0]) == 4
+    assert np.allclose(tables[1]["MLII_r_amplitude"], extractor.extract(record)["MLII_r_amplitude"],
+                       equal_nan=True)
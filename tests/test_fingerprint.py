@@ -0,0 +1,59 @@
+import pickle
+
+import numpy as np
+
+from pyecg import ECGRecord
+from pyecg.fingerprint import fingerprint, find_duplicates, candidate_pairs, FingerprintBuilder
+from pyecg.synthetic import SyntheticECG
+
+
+def test_exact(record):
+    f = record.fingerprint()
+    assert f == fingerprint(pickle.loads(pickle.dumps(record)))
+    assert f == record.fingerprint(chunk_size=1000)
+    assert hash(f) == hash(record.fingerprint(chunk_size=7777))
+    assert len(f.shingles) > 1000
+
+
+def test_content_changes(record):
+    f = record.fingerprint()
+    assert f != record[:len(record) - 1].fingerprint()
+    without_annotations = record[:]
+    without_annotations.annotations = None
+    assert f != without_annotations.fingerprint()
+    assert f.coarse == without_annotations.fingerprint().coarse
+
+
+def test_streaming(record):
+    f = record.fingerprint()
+    builder = FingerprintBuilder(record.fs, record.lead_names)
+    signal = record.p_signal
+    for start in range(0, signal.shape[1], 12345):
+        builder.update(signal[:, start:start + 12345])
+    builder.add_annotations(record.annotations.indices, record.annotations.labels)
+    streamed = builder.fingerprint()
+    assert streamed == f
+    assert np.array_equal(streamed.shingles, f.shingles)
+    assert np.array_equal(streamed.anchors, f.anchors)
+
+
+def test_find_duplicates(record):
+    ishine = ECGRecord.from_ishine("tests/ishine/ECG_P28.01.ecg")
+    records = [record, ishine, record[:], record[36000:300000]]
+    duplicates = find_duplicates(records)
+    kinds = {(d.first, d.second): d for d in duplicates}
+    assert kinds[(0, 2)].kind == "exact"
+    assert kinds[(0, 3)].kind == "overlap" and kinds[(0, 3)].offset == 36000
+    assert kinds[(2, 3)].kind == "overlap"
+    assert not any(1 in (d.first, d.second) for d in duplicates)
+
+
+def test_candidates_follow_content():
+    # unrelated records share a coarse bucket but no sketched shingles, so they are never paired
+    records = [SyntheticECG(seed=seed).record(120, name=str(seed)) for seed in range(20)]
+    records.append(records[5][3000:20000])
+    records.append(SyntheticECG(fs=500, seed=5).record(120))
+    fingerprints = [fingerprint(r) for r in records]
+    assert len(set(f.coarse for f in fingerprints)) == 2
+    assert candidate_pairs(fingerprints[:21]) == [(5, 20)]
+    assert find_duplicates(fingerprints) == [(5, 20, "overlap", 1.0, 3000)]
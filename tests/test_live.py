@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from pyecg.live import LiveECGRecord
+
+
+def live_record():
+    return LiveECGRecord("bed_1", 10, ["I", "II"], capacity=5.0)
+
+
+def test_bad_block():
+    with pytest.raises(ValueError):
+        live_record().append(np.zeros((3, 10)))
+
+
+@pytest.mark.parametrize("block_sizes", [[3] * 40, [49, 1, 7, 60, 2], [120], [50, 50]])
+def test_latest(block_sizes):
+    record = live_record()
+    signal = np.random.rand(2, sum(block_sizes))
+    offset = 0
+    for size in block_sizes:
+        record.append(signal[:, offset:offset + size])
+        offset += size
+        expected = signal[:, max(offset - 50, 0):offset]
+        assert len(record) == expected.shape[1]
+        assert np.array_equal(record.latest(), expected)
+        assert np.array_equal(record.latest(1.2), expected[:, -12:])
+    assert record.n_samples == signal.shape[1]
+
+
+def test_zero_copy_and_out():
+    record = live_record()
+    record.append(np.random.rand(2, 30))
+    assert np.shares_memory(record.latest(2.0), record._signal.buffer)
+    record.append(np.random.rand(2, 30))
+    out = np.empty((2, 50))
+    latest = record.latest(out=out)
+    assert np.shares_memory(latest, out)
+    assert np.array_equal(latest, np.concatenate([record._signal.buffer[:, 10:], record._signal.buffer[:, :10]], axis=1))
+
+
+def test_annotations_and_snapshot():
+    record = live_record()
+    for k in range(8):
+        record.append(np.full((2, 10), k, dtype=float))
+        record.add_annotation(10 * k + 5, "N" if k % 3 else "V")
+    indices, labels = record.latest_annotations(2.0)
+    assert indices.tolist() == [65, 75]
+    snapshot = record.to_record(2.0)
+    assert len(snapshot) == 20
+    assert np.allclose(snapshot.time[0], 6.0)
+    assert np.array_equal(snapshot.get_lead("II")[:], [6] * 10 + [7] * 10)
+    assert [(a.index, a.label) for a in snapshot.annotations] == [(5, "V"), (15, "N")]
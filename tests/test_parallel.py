@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.parallel import map_records, SerialExecutor
+from pyecg.shared import SharedRecord
+
+
+def double(x):
+    return 2 * x
+
+
+def record_length(record):
+    return len(record)
+
+
+@pytest.mark.parametrize("executor, chunk_size", [("serial", None), ("thread", None), ("thread", 100000),
+                                                  ("process", 300000)])
+def test_map_leads(record, executor, chunk_size):
+    mapped, timings = record.map_leads(double, executor=executor, max_workers=2, chunk_size=chunk_size,
+                                       return_timings=True)
+    assert mapped.lead_names == record.lead_names
+    assert np.array_equal(mapped.p_signal, 2 * record.p_signal)
+    assert mapped.time is record.time
+    n_chunks = 1 if chunk_size is None else -(-len(record) // chunk_size)
+    assert len(timings) == record.n_sig * n_chunks
+    assert sum(t.stop - t.start for t in timings) == record.n_sig * len(record)
+
+
+def test_map_leads_in_place():
+    record = ECGRecord.from_np_array("100", np.arange(10), np.arange(20.0).reshape(2, 10), ["I", "II"])
+    mapped = record.map_leads(double, executor="thread", chunk_size=3, in_place=True)
+    assert mapped is record
+    assert np.array_equal(record.p_signal, 2 * np.arange(20.0).reshape(2, 10))
+    assert isinstance(record.get_lead("I").seq_data, list)
+
+
+def test_map_leads_bad_length(record):
+    with pytest.raises(ValueError):
+        record[:100].map_leads(lambda x: x[:-1])
+
+
+def test_map_leads_borrowed_executor(record):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        record.map_leads(double, executor=executor)
+        assert executor.submit(len, [1]).result() == 1
+
+
+def test_bad_executor(record):
+    with pytest.raises(ValueError):
+        record.map_leads(double, executor="gpu")
+
+
+def test_serial_executor_exception():
+    with pytest.raises(ZeroDivisionError):
+        SerialExecutor().submit(lambda: 1 / 0).result()
+
+
+def test_map_records(record):
+    with SharedRecord.export(record) as shared:
+        results, timings = map_records([record[:100], shared.handle], record_length, executor="process",
+                                       max_workers=2)
+    assert results == [100, len(record)]
+    assert [t.name for t in timings] == ["100", "100"]
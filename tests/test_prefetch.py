@@ -0,0 +1,117 @@
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.prefetch import PrefetchLoader, load_record, record_nbytes
+from pyecg.synthetic import SyntheticECG
+
+SOURCES = ["tests/wfdb/100.hea", "tests/ishine/ECG_P28.01.ecg"]
+
+
+class SlowLoader:
+    # sleeps longer for earlier sources, so completion order is the reverse of submission order
+    def __init__(self, n):
+        self.n = n
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, source, window):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.03 * (self.n - source))
+        with self.lock:
+            self.active -= 1
+        return SyntheticECG().record(10, name=str(source))
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_load_files(executor):
+    windows = [(10.0, 20.0), None]
+    loader = PrefetchLoader(SOURCES, windows=windows, executor=executor)
+    records = list(loader)
+    assert len(records) == 2
+    assert records[0].lead_names == ["MLII", "V5"] and len(records[0]) == 3600
+    assert np.array_equal(records[0].p_signal, ECGRecord.from_wfdb("tests/wfdb/100").between(10.0, 20.0).p_signal)
+    assert records[1].record_name == ECGRecord.from_ishine(SOURCES[1]).record_name
+    assert loader.stats.loaded == 2
+
+
+def test_window_annotations(tmp_path, write_edf):
+    full = ECGRecord.from_wfdb("tests/wfdb/100")
+    window = load_record("tests/wfdb/100.hea", (10.0, 20.0))
+    assert window.annotations == full.annotations.window(3600, 7200)
+    assert window.annotations.indices[0] == 262
+    path = str(tmp_path / "sample.edf")
+    write_edf(path, np.sin(np.arange(5000).reshape(2, -1) / 50), ["I", "II"],
+              annotations=[(0.5, "N"), (3.25, "V"), (5.5, "N"), (9.998, "N")])
+    window = load_record(path, (3.0, 6.0))
+    assert len(window) == 750
+    assert [(a.index, a.label) for a in window.annotations] == [(62, "V"), (625, "N")]
+    assert window.annotations == ECGRecord.from_edf(path).between(3.0, 6.0).annotations
+
+
+def test_record_nbytes():
+    tracemalloc.start()
+    try:
+        record = ECGRecord.from_wfdb("tests/wfdb/100")
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # list-backed leads cost a boxed float per sample, far more than their 8 byte payload
+    assert record_nbytes(record) == pytest.approx(allocated, rel=0.2)
+    for signal in record._signals:
+        signal.seq_data = np.asarray(signal.seq_data, dtype=np.float64)
+    assert record_nbytes(record) == (1 + 2) * len(record) * 8
+
+
+def test_ordered_and_unordered():
+    n = 6
+    ordered = [int(r.record_name) for r in PrefetchLoader(range(n), loader=SlowLoader(n), max_workers=n, prefetch=n)]
+    assert ordered == list(range(n))
+    loader = PrefetchLoader(range(n), loader=SlowLoader(n), max_workers=n, prefetch=n, ordered=False)
+    items = list(loader.items())
+    assert sorted(index for index, _ in items) == list(range(n))
+    assert [index for index, _ in items] != list(range(n))
+    assert all(int(record.record_name) == index for index, record in items)
+
+
+def test_prefetch_depth_and_stats():
+    n = 8
+    slow = SlowLoader(n)
+    loader = PrefetchLoader(range(n), loader=slow, max_workers=8, prefetch=2)
+    for record in loader:
+        time.sleep(0.05)  # a consumer slower than the loaders lets the queue fill up
+    assert slow.max_active <= 2
+    assert loader.stats.loaded == n
+    assert loader.stats.stalls >= 1 and loader.stats.stall_seconds > 0
+    assert 1 <= loader.stats.max_depth <= 2 and loader.stats.mean_depth > 1
+
+
+def test_memory_cap():
+    n = 5
+    slow = SlowLoader(n)
+    loader = PrefetchLoader(range(n), loader=slow, max_workers=n, prefetch=n, max_bytes=1)
+    for record in loader:
+        time.sleep(0.05)
+    assert loader.stats.loaded == n
+    assert loader.stats.max_depth == 1
+    assert loader.stats.peak_bytes <= 3 * 2500 * 8
+    capped = PrefetchLoader(range(n), loader=SlowLoader(n), max_workers=n, prefetch=n, max_bytes=3 * 2500 * 8 * 2)
+    for record in capped:
+        time.sleep(0.05)
+    assert capped.stats.max_depth == 2
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        load_record("record.csv")
+    with pytest.raises(ValueError):
+        PrefetchLoader(SOURCES, windows=[None])
+    with pytest.raises(FileNotFoundError):
+        list(PrefetchLoader(["tests/ishine/missing.ecg"], executor="thread"))
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from pyecg.pyramid import MinMaxPyramid
+
+
+def brute_force(signal, factor):
+    n_bins = -(-signal.shape[1] // factor)
+    padded_lo = np.pad(signal, ((0, 0), (0, n_bins * factor - signal.shape[1])), constant_values=np.inf)
+    padded_hi = np.pad(signal, ((0, 0), (0, n_bins * factor - signal.shape[1])), constant_values=-np.inf)
+    return (padded_lo.reshape(signal.shape[0], n_bins, factor).min(axis=2),
+            padded_hi.reshape(signal.shape[0], n_bins, factor).max(axis=2))
+
+
+@pytest.mark.parametrize("samples", [1, 2, 1000, 1023, 4097])
+def test_levels(samples):
+    signal = np.random.rand(3, samples)
+    pyramid = MinMaxPyramid(360, ["I", "II", "III"])
+    pyramid.extend(signal)
+    assert pyramid.n_levels == int(np.floor(np.log2(samples))) + 1
+    for k, factor in enumerate(pyramid.factors):
+        lo, hi = pyramid.level(k)
+        expected_lo, expected_hi = brute_force(signal, factor)
+        assert np.array_equal(lo, expected_lo)
+        assert np.array_equal(hi, expected_hi)
+
+
+@pytest.mark.parametrize("block_sizes", [[1] * 37, [5, 3, 100, 1, 64], [1000]])
+def test_incremental(block_sizes):
+    signal = np.random.rand(2, sum(block_sizes))
+    pyramid = MinMaxPyramid(360, ["I", "II"])
+    offset = 0
+    for size in block_sizes:
+        pyramid.extend(signal[:, offset:offset + size])
+        offset += size
+        for k, factor in enumerate(pyramid.factors):
+            assert np.array_equal(pyramid.level(k)[0], brute_force(signal[:, :offset], factor)[0])
+            assert np.array_equal(pyramid.level(k)[1], brute_force(signal[:, :offset], factor)[1])
+
+
+def test_envelope(record):
+    pyramid = MinMaxPyramid.from_record(record)
+    signal = record.p_signal
+    factor, lo, hi = pyramid.envelope(0, record.duration + 1, 1000)
+    assert factor == 512
+    assert 1000 <= lo.shape[1] <= 2000
+    assert np.array_equal(lo.min(axis=1), signal.min(axis=1))
+    assert np.array_equal(hi.max(axis=1), signal.max(axis=1))
+    factor, lo, hi = pyramid.envelope(60, 70, 800)
+    assert factor == 4
+    assert np.array_equal(lo, brute_force(signal[:, 60 * 360:70 * 360], 4)[0])
+    factor, lo, hi = pyramid.envelope(60, 61, 800)
+    assert factor == 1
+    assert np.array_equal(lo, signal[:, 60 * 360:61 * 360])
+
+
+def test_save_load(record, tmp_path):
+    pyramid = MinMaxPyramid.from_record(record[:10001])
+    path = str(tmp_path / "100.lod.npz")
+    pyramid.save(path)
+    loaded = MinMaxPyramid.load(path)
+    assert loaded.lead_names == pyramid.lead_names
+    assert loaded.factors == pyramid.factors
+    for k in range(pyramid.n_levels):
+        assert np.array_equal(loaded.level(k)[0], pyramid.level(k)[0])
+    extra = np.random.rand(2, 77)
+    pyramid.extend(extra)
+    loaded.extend(extra)
+    assert np.array_equal(loaded.level(3)[1], pyramid.level(3)[1])
+
+
+def test_streaming_envelope():
+    signal = np.random.rand(2, 50000)
+    pyramid = MinMaxPyramid(360, ["I", "II"])
+    for offset in range(0, 50000, 997):
+        pyramid.extend(signal[:, offset:offset + 997])
+        stop = min(offset + 997, 50000)
+        factor, lo, hi = pyramid.envelope_samples(max(stop - 5000, 0), stop, 100)
+        expected_lo, expected_hi = brute_force(signal[:, :stop], factor)
+        first = max(stop - 5000, 0) // factor
+        assert np.array_equal(lo, expected_lo[:, first:first + lo.shape[1]])
+        assert np.array_equal(hi, expected_hi[:, first:first + hi.shape[1]])
+    # levels grow in place, a small extend reuses the buffer
+    buffer = pyramid._buffers[0][0]
+    pyramid.extend(signal[:, :2])
+    assert pyramid._buffers[0][0] is buffer
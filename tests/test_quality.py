@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.annotations import ARTEFACT, ARTEFACT_END
+from pyecg.quality import SignalQuality, window_view
+
+
+def corrupted(record, lead, seconds, corruption):
+    fs = record.time.fs
+    signal = record[:60 * fs].p_signal
+    segment = slice(int(seconds[0] * fs), int(seconds[1] * fs))
+    signal[lead, segment] = corruption(signal[lead, segment])
+    return ECGRecord.from_np_array("100", np.arange(signal.shape[1]) / fs, signal, record.lead_names)
+
+
+def test_window_view():
+    signal = np.arange(20).reshape(2, 10)
+    windows = window_view(signal, 4, 3)
+    assert windows.shape == (2, 3, 4)
+    assert np.array_equal(windows[1, 2], [16, 17, 18, 19])
+    assert window_view(signal, 11, 1).shape == (2, 0, 11)
+
+
+def test_clean_record(record):
+    report = SignalQuality().score(record)
+    assert len(report) == 1804
+    assert np.all(report.quality == 1)
+    assert len(report.to_annotation()) == 0
+
+
+@pytest.mark.parametrize("check, lead, corruption", [
+    ("flatline", 0, lambda x: np.zeros_like(x)),
+    ("clipping", 1, lambda x: np.clip(20 * x, -3, 3)),
+    ("hf_noise", 0, lambda x: x + 0.5 * np.random.RandomState(0).randn(len(x))),
+    ("drift", 1, lambda x: x + np.linspace(0, 5, len(x))),
+    ("lead_off", 0, lambda x: np.full_like(x, np.nan)),
+])
+def test_detection(record, check, lead, corruption):
+    report = SignalQuality().score(corrupted(record, lead, (20, 30), corruption))
+    flagged = report.starts[report.flags[check][lead]]
+    assert len(flagged) > 0
+    assert flagged.min() >= 18 * 360 and flagged.max() <= 30 * 360
+    assert not np.any(report.flags[check][1 - lead])
+
+
+def test_artefact_annotation(record):
+    report = SignalQuality().score(corrupted(record, 0, (20, 30), lambda x: np.zeros_like(x)))
+    annotation = report.to_annotation()
+    assert list(annotation.labels) == [ARTEFACT, ARTEFACT_END]
+    assert 18 * 360 <= annotation.indices[0] <= 20 * 360
+    assert 28 * 360 <= annotation.indices[1] < 32 * 360
+    starts, stops = report.runs()
+    assert np.array_equal(starts, annotation.indices[:1]) and np.array_equal(stops, annotation.indices[1:] + 1)
+    assert np.all(report.quality[report.quality < 1] == 0.5)
+    assert len(report.good_windows(min_quality=0.5)) == len(report)
+    mask = report.sample_mask(60 * 360)
+    assert mask[:18 * 360].all() and not mask[21 * 360:29 * 360].any() and mask[31 * 360:].all()
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from pyecg import ECGRecord
+from pyecg.sampler import WindowSampler
+
+
+@pytest.fixture(scope="module")
+def records():
+    record = ECGRecord.from_wfdb("tests/wfdb/100")
+    return [record, ECGRecord.from_ishine("tests/ishine/ECG_P28.01.ecg")]
+
+
+def test_index(records):
+    sampler = WindowSampler(records, window=(0.25, 0.5))
+    assert sampler.classes == ["A", "N", "V"]
+    assert sampler.class_counts["A"] == 33 and sampler.class_counts["V"] == 1
+    assert sampler.class_counts["N"] > 2200
+    assert set(np.unique(sampler.record_index).tolist()) == {0, 1}
+
+
+def test_window(records):
+    sampler = WindowSampler(records, window=(0.25, 0.5), labels=["V"])
+    window, label = sampler.get_window(0)
+    assert label == "V"
+    assert len(window) == 90 + 180
+    assert window.lead_names == ["MLII", "V5"]
+    # only the annotations inside the window, re-indexed to it
+    assert (90, "V") in [(a.index, a.label) for a in window.annotations]
+    assert all(0 <= a.index < len(window) for a in window.annotations)
+    assert len(window.annotations) < 5
+
+
+@pytest.mark.parametrize("mode", ["sequential", "shuffle", "stratified", "weighted"])
+def test_deterministic(records, mode):
+    sampler = WindowSampler(records, seed=3)
+    assert np.array_equal(sampler.epoch(1, mode=mode), sampler.epoch(1, mode=mode))
+    if mode != "sequential":
+        assert not np.array_equal(sampler.epoch(1, mode=mode), sampler.epoch(2, mode=mode))
+
+
+def test_shuffle_is_permutation(records):
+    sampler = WindowSampler(records)
+    assert np.array_equal(np.sort(sampler.epoch(0)), np.arange(len(sampler)))
+
+
+@pytest.mark.parametrize("mode", ["stratified", "weighted"])
+def test_balanced(records, mode):
+    sampler = WindowSampler(records)
+    order = sampler.epoch(0, mode=mode, n_samples=3000)
+    assert len(order) == 3000
+    counts = np.bincount(sampler.label_code[order], minlength=len(sampler.classes))
+    assert np.all(np.abs(counts - 1000) < 150)
+
+
+def test_weighted_custom(records):
+    sampler = WindowSampler(records)
+    order = sampler.epoch(0, mode="weighted", n_samples=1000, weights={"N": 1.0})
+    assert set(sampler.label_code[order].tolist()) == {sampler.classes.index("N")}
+
+
+def test_sharding(records):
+    sampler = WindowSampler(records)
+    shards = [sampler.epoch(5, rank=r, world_size=3) for r in range(3)]
+    assert len(set(len(s) for s in shards)) == 1
+    merged = np.concatenate(shards)
+    assert len(np.unique(merged)) == len(merged) >= len(sampler) - 2
+    with pytest.raises(ValueError):
+        sampler.epoch(0, rank=3, world_size=3)
+
+
+def test_save_load(records, tmp_path):
+    sampler = WindowSampler(records, window=(0.2, 0.3), seed=7)
+    path = str(tmp_path / "index.npz")
+    sampler.save(path)
+    loaded = WindowSampler.load(path, records, seed=7)
+    assert loaded.class_counts == sampler.class_counts
+    assert np.array_equal(loaded.epoch(2, mode="stratified"), sampler.epoch(2, mode="stratified"))
+    assert len(next(loaded.windows(0))[0]) == len(next(sampler.windows(0))[0])
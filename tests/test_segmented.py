@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from pyecg.segmented import SegmentedArray
+
+
+def segmented():
+    return SegmentedArray([np.arange(0, 4), [4, 5], np.arange(6, 10)])
+
+
+def test_length():
+    assert len(segmented()) == 10
+    assert len(SegmentedArray([])) == 0
+
+
+@pytest.mark.parametrize("index", [0, 3, 4, 5, 6, 9, -1, -10])
+def test_single_element(index):
+    assert segmented()[index] == np.arange(10)[index]
+
+
+@pytest.mark.parametrize("index", [10, -11])
+def test_out_of_range(index):
+    with pytest.raises(IndexError):
+        segmented()[index]
+
+
+@pytest.mark.parametrize("slice_", [slice(0, 10), slice(2, 7), slice(4, 6), slice(5, 5), slice(-3, None),
+                                    slice(None, None, 3), slice(8, 2, -1)])
+def test_slicing(slice_):
+    assert np.array_equal(np.asarray(segmented()[slice_]), np.arange(10)[slice_])
+
+
+def test_slicing_is_zero_copy():
+    buffer = np.arange(10)
+    sliced = SegmentedArray([buffer[:5], buffer[5:]])[3:8]
+    assert all(np.shares_memory(s, buffer) for s in sliced.segments)
+
+
+def test_nested_segments_are_flattened():
+    nested = SegmentedArray([segmented(), np.arange(10, 12)])
+    assert len(nested.segments) == 4
+    assert nested == np.arange(12)
+
+
+def test_iter():
+    assert list(segmented()) == list(range(10))
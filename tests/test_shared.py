@@ -0,0 +1,71 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from pyecg.shared import SharedRecord, dumps, loads
+
+
+def lead_sum(handle):
+    with SharedRecord.attach(handle) as shared:
+        record = shared.record
+        result = record.p_signal.sum(axis=1), len(record.annotations)
+        del record
+    return result
+
+
+@pytest.mark.parametrize("use_file", [False, True])
+def test_export_attach(record, tmp_path, use_file):
+    path = str(tmp_path / "100.shm") if use_file else None
+    with SharedRecord.export(record, path=path) as shared:
+        attached = SharedRecord.attach(pickle.loads(pickle.dumps(shared.handle)))
+        record_attached = attached.record
+        assert record_attached.lead_names == record.lead_names
+        assert record_attached.time.fs == record.time.fs
+        assert np.array_equal(record_attached.p_signal, record.p_signal)
+        assert record_attached.annotations == record.annotations
+        assert np.shares_memory(np.asarray(record_attached.get_lead("MLII")), attached.arrays["signals"])
+        del record_attached
+        attached.close()
+
+
+def test_attached_views_are_shared(record):
+    with SharedRecord.export(record[:1000]) as shared:
+        attached = SharedRecord.attach(shared.handle)
+        attached.arrays["signals"][0, 0] = 42.0
+        assert shared.record.get_lead("MLII")[0] == 42.0
+        attached.close()
+
+
+def test_unlink_non_owner(record):
+    with SharedRecord.export(record[:100]) as shared:
+        attached = SharedRecord.attach(shared.handle)
+        with pytest.raises(ValueError):
+            attached.unlink()
+        attached.close()
+
+
+def test_closed_record(record):
+    shared = SharedRecord.export(record[:100])
+    shared.close()
+    shared.unlink()
+    with pytest.raises(ValueError):
+        shared.record
+
+
+def test_process_pool(record):
+    with SharedRecord.export(record) as shared:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            sums, n_annotations = executor.submit(lead_sum, shared.handle).result()
+    assert np.allclose(sums, record.p_signal.sum(axis=1))
+    assert n_annotations == len(record.annotations)
+
+
+def test_dumps_out_of_band(record):
+    payload, buffers = dumps(record)
+    assert len(payload) < 100000
+    assert sum(memoryview(b).nbytes for b in buffers) >= record.p_signal.nbytes
+    record_loaded = loads(payload, buffers)
+    assert np.array_equal(record_loaded.p_signal, record.p_signal)
+    assert record_loaded.annotations == record.annotations
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from scipy import signal as sp_signal
+
+from pyecg.annotations import ECGAnnotation
+from pyecg.spectral import welch, stft, WelchAccumulator, lomb_scargle, hrv_frequency, rr_intervals
+
+
+@pytest.mark.parametrize("nperseg, noverlap", [(256, None), (128, 0), (255, 200)])
+def test_welch_matches_scipy(nperseg, noverlap):
+    x = np.random.RandomState(0).randn(3, 5000)
+    frequencies, psd = welch(x, 250, nperseg=nperseg, noverlap=noverlap)
+    expected_frequencies, expected = sp_signal.welch(x, 250, nperseg=nperseg, noverlap=noverlap)
+    assert np.allclose(frequencies, expected_frequencies)
+    assert np.allclose(psd, expected)
+
+
+def test_streaming_psd(record):
+    frequencies, psd = welch(record.p_signal, record.fs)
+    accumulator = WelchAccumulator(record.fs, batch_size=10)
+    for start in range(0, len(record), 9999):
+        accumulator.update(record.p_signal[:, start:start + 9999])
+    assert np.allclose(accumulator.psd, psd)
+    assert np.allclose(record.psd()[1], psd)
+    assert frequencies[np.argmax(psd[0, 1:]) + 1] < 20
+
+
+def test_psd_needs_a_segment():
+    with pytest.raises(ValueError):
+        WelchAccumulator(250).update(np.zeros((1, 100))).psd
+
+
+def test_stft_matches_scipy():
+    x = np.random.RandomState(1).randn(2, 3000)
+    frequencies, times, spectra = stft(x, 250, nperseg=128)
+    expected = sp_signal.stft(x, 250, nperseg=128, boundary=None, padded=False, detrend="constant",
+                              scaling="spectrum")[2]
+    assert spectra.shape == (2, 65, len(times))
+    assert np.allclose(np.abs(spectra) / np.hanning(129)[:-1].sum(), np.abs(expected))
+
+
+def test_lomb_scargle_peak():
+    times = np.sort(np.random.RandomState(2).uniform(0, 300, 400))
+    frequencies = np.linspace(0.01, 0.5, 491)
+    power = lomb_scargle(times, np.sin(2 * np.pi * 0.1 * times), frequencies)
+    assert frequencies[np.argmax(power)] == pytest.approx(0.1)
+    assert np.allclose(lomb_scargle(times, np.sin(2 * np.pi * 0.1 * times), frequencies, batch_size=7), power)
+
+
+def test_hrv_bands():
+    # RR modulated at 0.1 Hz (LF) with a weaker 0.25 Hz (HF) component
+    fs, t, beats = 250, 0.0, []
+    while t < 600:
+        beats.append(int(round(t * fs)))
+        t += 0.8 + 0.04 * np.sin(2 * np.pi * 0.1 * t) + 0.02 * np.sin(2 * np.pi * 0.25 * t)
+    annotations = ECGAnnotation.from_arrays(beats, ["N"] * len(beats))
+    for method in ["resample", "lomb"]:
+        hrv = hrv_frequency(annotations, fs, method=method)
+        assert hrv["lf"] > hrv["hf"] > 10 * hrv["vlf"]
+        assert 2 < hrv["lf_hf"] < 8
+
+
+def test_nn_intervals():
+    annotations = ECGAnnotation.from_arrays([0, 200, 400, 520, 800, 1000, 1100, 1400, 1600],
+                                            ["N", "N", "N", "V", "N", "N", "!", "N", "N"])
+    times, rr = rr_intervals(annotations, 200)
+    assert np.allclose(times, [1.0, 2.0, 5.0, 8.0])
+    assert np.allclose(rr, [1.0, 1.0, 1.0, 1.0])
+
+
+def test_hrv_record(record):
+    times, rr = rr_intervals(record.annotations, record.fs)
+    assert len(rr) == 2204  # 2239 normal beats, 34 ectopic beats each take out the intervals on both sides
+    assert len(rr_intervals(record.annotations, record.fs, labels=["N", "A", "V"])[1]) == 2272
+    resample, lomb = hrv_frequency(record.annotations, record.fs), \
+        hrv_frequency(record.annotations, record.fs, method="lomb")
+    assert resample["lf_hf"] == pytest.approx(lomb["lf_hf"], rel=0.5)
+    with pytest.raises(ValueError):
+        hrv_frequency(record.annotations, record.fs, method="fft")
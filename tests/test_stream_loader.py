@@ -0,0 +1,198 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+import wfdb
+
+from pyecg.importers.stream import StreamLoader, LiveStreamServer, encode_frame, read_frame, open_source
+
+FRAME_SAMPLES = 360
+
+
+@pytest.fixture(scope="module")
+def digital_100():
+    return wfdb.rdrecord("tests/wfdb/100", physical=False).d_signal.T - 1024
+
+
+def fed_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def replay_frames(digital):
+    return [encode_frame(digital[:, i:i + FRAME_SAMPLES]) for i in range(0, digital.shape[1], FRAME_SAMPLES)]
+
+
+async def replay_server(frames, path=None):
+    async def handle(reader, writer):
+        for frame in frames:
+            writer.write(frame)
+            await writer.drain()
+        writer.close()
+    if path is not None:
+        return await asyncio.start_unix_server(handle, path)
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.parametrize("dtype", ["<i2", "<f4", "<f8"])
+def test_frame_roundtrip(dtype):
+    block = np.arange(12).reshape(3, 4)
+
+    async def read_all():
+        reader = fed_reader(encode_frame(block, dtype) + encode_frame(block[:, :1], dtype))
+        return [await read_frame(reader) for _ in range(3)]
+    first, second, end = asyncio.run(read_all())
+    assert np.array_equal(first, block) and np.array_equal(second, block[:, :1]) and end is None
+
+
+def test_bad_frame():
+    async def read():
+        return await read_frame(fed_reader(b"XXXX" + bytes(8)))
+    with pytest.raises(ValueError):
+        asyncio.run(read())
+
+
+def test_tcp_replay(digital_100):
+    loader = StreamLoader(360, ["MLII", "V5"], gain=200)
+
+    async def run():
+        server = await replay_server(replay_frames(digital_100))
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        record = await loader.read_record(reader, "100")
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return record
+    record = asyncio.run(run())
+    assert len(record) == 650000
+    assert record.lead_names == ["MLII", "V5"]
+    assert np.allclose(record.get_lead("MLII")[:10], [-0.145] * 8 + [-0.12, -0.135])
+
+
+def test_unix_socket_load(digital_100, tmp_path):
+    path = str(tmp_path / "100.sock")
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(replay_server(replay_frames(digital_100[:, :36000]), path))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        record = StreamLoader(360, ["MLII", "V5"], gain=200).load(path)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+    assert record.record_name == "100"
+    assert np.allclose(record.p_signal, digital_100[:, :36000] / 200)
+
+
+def test_pipe_load(digital_100, tmp_path):
+    path = str(tmp_path / "100.fifo")
+    os.mkfifo(path)
+    frames = replay_frames(digital_100[:, :3600])
+
+    def write():
+        with open(path, "wb") as f:
+            for frame in frames:
+                f.write(frame)
+    writer = threading.Thread(target=write)
+    writer.start()
+    record = StreamLoader(360, ["MLII", "V5"], gain=200).load(path)
+    writer.join()
+    assert np.allclose(record.p_signal, digital_100[:, :3600] / 200)
+
+
+def test_pipe_open_does_not_block_loop(digital_100, tmp_path):
+    path = str(tmp_path / "100.fifo")
+    os.mkfifo(path)
+    frames = replay_frames(digital_100[:, :720])
+
+    async def run():
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0.01)
+        ticker = asyncio.ensure_future(tick())
+        opening = asyncio.ensure_future(open_source(path))
+        await asyncio.sleep(0.2)
+        assert not opening.done() and len(ticks) > 5  # no writer yet, the loop keeps running
+
+        def write():
+            with open(path, "wb") as f:
+                for frame in frames:
+                    f.write(frame)
+        writer = threading.Thread(target=write)
+        writer.start()
+        reader, _ = await opening
+        record = await StreamLoader(360, ["MLII", "V5"], gain=200).read_record(reader)
+        writer.join()
+        ticker.cancel()
+        return record
+    assert np.allclose(asyncio.run(run()).p_signal, digital_100[:, :720] / 200)
+
+
+def test_file_load(digital_100, tmp_path):
+    path = str(tmp_path / "100.frames")
+    with open(path, "wb") as f:
+        f.write(b"".join(replay_frames(digital_100[:, :36000])))
+    record = StreamLoader(360, ["MLII", "V5"], gain=200).load(path)
+    assert record.record_name == "100"
+    assert np.allclose(record.p_signal, digital_100[:, :36000] / 200)
+    with open(path, "ab") as f:
+        f.write(b"ECGF")
+    with pytest.raises(ValueError):
+        StreamLoader(360, ["MLII", "V5"], gain=200).load(path)
+
+
+def test_backpressure(digital_100):
+    loader = StreamLoader(360, ["MLII", "V5"], queue_size=1)
+    pending = []
+
+    async def run():
+        reader = fed_reader(b"".join(replay_frames(digital_100[:, :36000])))
+
+        async def slow_sink(block):
+            # with a queue of one frame the reader may only run one frame ahead of the sink
+            pending.append(len(reader._buffer))
+            await asyncio.sleep(0)
+        return await loader.consume(reader, slow_sink)
+    assert asyncio.run(run()) == 36000
+    frame_size = len(replay_frames(digital_100[:, :360])[0])
+    assert pending[0] >= len(pending) * frame_size - 3 * frame_size
+
+
+def test_concurrent_streams(digital_100):
+    n_streams = 100
+    finished = {}
+    server = LiveStreamServer(StreamLoader(360, ["MLII", "V5"], gain=200), capacity=10.0,
+                              on_close=finished.__setitem__)
+    frames = replay_frames(digital_100[:, :36000])
+
+    async def device(host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        for frame in frames:
+            writer.write(frame)
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    async def run():
+        host, port = await server.start()
+        await asyncio.gather(*[device(host, port) for _ in range(n_streams)])
+        while len(finished) < n_streams:
+            await asyncio.sleep(0.01)
+        await server.close()
+    asyncio.run(asyncio.wait_for(run(), 60))
+    assert server.records == {}
+    assert sorted(finished) == list(range(n_streams))
+    for live in finished.values():
+        assert live.n_samples == 36000
+        assert np.allclose(live.latest(), digital_100[:, 32400:36000] / 200)
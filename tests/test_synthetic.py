@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from pyecg.annotations import PVC, ARTEFACT
+from pyecg.clustering import BeatClusterer
+from pyecg.spectral import hrv_frequency
+from pyecg.synthetic import SyntheticECG
+
+
+def test_record():
+    generator = SyntheticECG(fs=360, lead_names=["MLII", "V1"], heart_rate=60, ectopic_rate=0.1, seed=1)
+    record = generator.record(600, name="load")
+    assert record.record_name == "load" and record.lead_names == ["MLII", "V1"]
+    assert len(record) == 600 * 360 and record.fs == 360
+    labels = record.annotations.labels
+    beats = labels != ARTEFACT
+    assert 560 < beats.sum() < 640
+    assert 0.05 < (labels == PVC).mean() < 0.15
+    peaks = record.annotations.indices[labels == "N"][5:-5]
+    assert np.median(record.p_signal[0, peaks]) == pytest.approx(1.0, abs=0.2)
+
+
+def test_deterministic_and_chunked():
+    generator = SyntheticECG(artefact_rate=100)
+    record = generator.record(400)
+    assert np.array_equal(record.p_signal, SyntheticECG(artefact_rate=100).record(400).p_signal)
+    chunks = list(generator.chunks(len(record), chunk_size=7777))
+    assert [start for start, _ in chunks] == list(range(0, len(record), 7777))
+    assert np.array_equal(np.concatenate([block for _, block in chunks], axis=1), record.p_signal)
+    assert not np.array_equal(SyntheticECG(seed=5).record(400).p_signal, record.p_signal)
+
+
+def test_longer_records_extend_shorter_ones():
+    generator = SyntheticECG(artefact_rate=100)
+    short, long = generator.beats(250 * 600), generator.beats(250 * 1200)
+    assert np.array_equal(long[0][:len(short[0])], short[0])
+    assert np.array_equal(generator.record(600).p_signal, generator.record(1200)[:250 * 600].p_signal)
+
+
+def test_ground_truth_is_recoverable():
+    record = SyntheticECG(ectopic_rate=0.1, artefact_rate=0).record(300)
+    clusters = BeatClusterer().fit(record)
+    assert clusters.label_counts(0) == {"N": clusters.counts[0]}
+    assert clusters.label_counts(1) == {"V": clusters.counts[1]}
+    hrv = hrv_frequency(record.annotations, record.fs)
+    assert hrv["lf"] > 0 and hrv["hf"] > 0
+    regular = SyntheticECG(ectopic_rate=0, rr_jitter=0, lf_amplitude=0.05, hf_amplitude=0.02).record(600)
+    assert hrv_frequency(regular.annotations, regular.fs)["lf_hf"] > 1
+
+
+def test_unknown_lead():
+    with pytest.raises(ValueError):
+        SyntheticECG(lead_names=["Z"])